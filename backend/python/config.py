@@ -22,12 +22,106 @@ class Config:
     CLIP_MODEL_NAME = "openai/clip-vit-base-patch32"
     GEMINI_MODEL_NAME = "gemini-2.5-flash"
     GEMINI_TEMPERATURE = 0.2
+    TORCH_NUM_THREADS = int(os.getenv("TORCH_NUM_THREADS", "0"))  # 0 = torch default
+    # Text tower runtime: "full" (fp32 CLIPModel), "torch", "torch-int8", "onnx" or "onnx-int8"
+    CLIP_TEXT_BACKEND = os.getenv("CLIP_TEXT_BACKEND", "full")
+    CLIP_ONNX_PATH = os.getenv("CLIP_ONNX_PATH", "models/clip-text.onnx")
+    # Query-only workers can skip the vision tower (non-"full" backends only)
+    CLIP_LOAD_VISION = os.getenv("CLIP_LOAD_VISION", "true").lower() == "true"
+    INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))  # threads running forward passes
+    QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))  # 1 disables micro-batching
+    QUERY_BATCH_MAX_WAIT_MS = float(os.getenv("QUERY_BATCH_MAX_WAIT_MS", "5"))
+    # Stored embedding format: "float16", "int8" (quantized + scale) or "json" (legacy list)
+    EMBEDDING_ENCODING = os.getenv("EMBEDDING_ENCODING", "float16")
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+    QUERY_EMBEDDING_CACHE_TTL = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "86400"))  # seconds
     
     # RAG Configuration
+    # Chunk sizing: "tokens" counts CLIP tokens, "chars" is the legacy character splitter
+    CHUNK_UNIT = os.getenv("CHUNK_UNIT", "tokens")
     CHUNK_SIZE = 500
     CHUNK_OVERLAP = 100
+    CLIP_TEXT_WINDOW = 75  # tokens per CLIP text pass (77 minus BOS/EOS)
+    CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "75"))
+    CHUNK_TOKEN_OVERLAP = int(os.getenv("CHUNK_TOKEN_OVERLAP", "15"))
+    # Chunks longer than CLIP_TEXT_WINDOW: "truncate", "mean" (pool sub-window
+    # embeddings into one vector) or "separate" (one vector per sub-window)
+    CHUNK_MULTI_VECTOR = os.getenv("CHUNK_MULTI_VECTOR", "mean")
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+    INGEST_PAGE_WINDOW = int(os.getenv("INGEST_PAGE_WINDOW", "16"))  # pages embedded together
+    INGEST_QUEUE_SIZE = 2  # windows buffered between ingestion stages
+    PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))  # 0 = extract in-process
+    PDF_WORKER_IDLE_SECONDS = float(os.getenv("PDF_WORKER_IDLE_SECONDS", "5"))  # workers close an idle PDF after this
     TOP_K_RETRIEVAL = 5
     SIMILARITY_THRESHOLD = 0.90
+
+    # In-process answer cache (exact fingerprint repeats)
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2048"))
+    ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))  # seconds
+
+    # Document metadata (name, fileUrl) cache
+    DOCUMENT_CACHE_SIZE = int(os.getenv("DOCUMENT_CACHE_SIZE", "1024"))
+    DOCUMENT_CACHE_TTL = int(os.getenv("DOCUMENT_CACHE_TTL", "300"))  # seconds
+
+    # Source PDF and re-extracted image caches (multimodal answers)
+    PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "")  # empty = keep PDFs in memory
+    IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "512"))
+    IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # base64 bytes
+    IMAGE_EXTRACT_CONCURRENCY = int(os.getenv("IMAGE_EXTRACT_CONCURRENCY", "3"))
+    IMAGE_EXTRACT_TIMEOUT = float(os.getenv("IMAGE_EXTRACT_TIMEOUT", "5"))  # seconds per image
+
+    # Persistent embedding cache for repeated chunks and images (logos, footers)
+    EMBEDDING_STORE_PATH = os.getenv("EMBEDDING_STORE_PATH", "cache/embeddings.sqlite3")  # empty = disabled
+    EMBEDDING_STORE_MAX_BYTES = int(os.getenv("EMBEDDING_STORE_MAX_BYTES", str(512 * 1024 * 1024)))
+    EMBEDDING_STORE_BUSY_TIMEOUT = float(os.getenv("EMBEDDING_STORE_BUSY_TIMEOUT", "5"))  # seconds to wait on a locked database
+    EMBEDDING_STORE_TOUCH_INTERVAL = int(os.getenv("EMBEDDING_STORE_TOUCH_INTERVAL", "600"))  # min seconds between last_used updates
+
+    # Thumbnails stored at ingestion: "" (off), "local" or "firebase"
+    THUMBNAIL_STORE = os.getenv("THUMBNAIL_STORE", "")
+    THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", "thumbnails")
+    THUMBNAIL_BUCKET = os.getenv("THUMBNAIL_BUCKET")  # Cloud Storage bucket for "firebase"
+    THUMBNAIL_MAX_SIZE = int(os.getenv("THUMBNAIL_MAX_SIZE", "768"))  # longest side, pixels
+    THUMBNAIL_FORMAT = os.getenv("THUMBNAIL_FORMAT", "JPEG").upper()  # JPEG or WEBP
+    THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
+    # Vector Index Configuration
+    # ANN_BACKEND: "auto" (HNSW if faiss is installed, else IVF), "ivf", "hnsw" or "exact"
+    ANN_BACKEND = os.getenv("ANN_BACKEND", "auto")
+    ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "20000"))  # exact search below this size
+    ANN_RETRAIN_FACTOR = 2  # rebuild IVF once the corpus doubles since training
+    ANN_FILTER_OVERSAMPLE = 10  # extra candidates fetched when a filter is applied
+    ANN_COMPACT_FRACTION = 0.2  # rebuild once this share of indexed rows is deleted
+    IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))  # 0 = 4 * sqrt(n)
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+    IVF_TRAIN_SAMPLES_PER_LIST = 64
+    IVF_TRAIN_ITERATIONS = 10
+    HNSW_M = int(os.getenv("HNSW_M", "32"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+
+    # Firestore Access Configuration
+    FIRESTORE_THREAD_POOL_SIZE = int(os.getenv("FIRESTORE_THREAD_POOL_SIZE", "16"))
+    FIRESTORE_USE_BULK_WRITER = os.getenv("FIRESTORE_USE_BULK_WRITER", "true").lower() == "true"
+    FIRESTORE_BATCH_MAX_WRITES = 500
+    FIRESTORE_BATCH_MAX_BYTES = 9 * 1024 * 1024  # headroom under the 10 MB request limit
+    FIRESTORE_MAX_IN_FLIGHT = int(os.getenv("FIRESTORE_MAX_IN_FLIGHT", "4"))
+    FIRESTORE_COMMIT_RETRIES = 5
+    FIRESTORE_RETRY_BASE_DELAY = 0.5  # seconds, doubled per attempt
+    MANIFEST_PAGES_PER_PART = 100  # page manifest entries per Firestore document
+    WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))  # seconds
+    WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "3"))  # flushes before a write is dropped
+    
+    # Outbound HTTP (shared pooled session)
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "16"))
+    HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))  # seconds
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))  # seconds
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))  # seconds without receiving data
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+    HTTP_MAX_DOWNLOAD_BYTES = int(os.getenv("HTTP_MAX_DOWNLOAD_BYTES", str(2 * 1024 * 1024 * 1024)))
+    HTTP_CHUNK_SIZE = 256 * 1024
     
     # CORS Configuration
     CORS_ORIGINS = ["*"]
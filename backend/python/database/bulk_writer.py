@@ -0,0 +1,153 @@
+"""
+Bulk Firestore writes split into size- and count-bounded batches
+"""
+import asyncio
+import random
+import time
+from database.firebase_client import firebase_client
+from config import Config
+
+
+def estimate_size(value) -> int:
+    """Approximate Firestore storage size of a field value in bytes"""
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k)) + 1 + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value)
+    return 16  # sentinels, timestamps, references
+
+
+class BulkWriter:
+    """
+    Commits any number of writes, staying under Firestore's per-request
+    limits of 500 writes and 10 MB
+
+    Each op is a tuple (action, document reference, data) where action is
+    "set", "update" or "delete" (data is None for deletes).
+    """
+
+    @staticmethod
+    def split_batches(ops):
+        """Group ops so each batch respects the write-count and byte limits"""
+        batches = []
+        current, current_bytes = [], 0
+
+        for op in ops:
+            op_bytes = len(op[1].path) + estimate_size(op[2])
+            if current and (len(current) >= Config.FIRESTORE_BATCH_MAX_WRITES or
+                            current_bytes + op_bytes > Config.FIRESTORE_BATCH_MAX_BYTES):
+                batches.append(current)
+                current, current_bytes = [], 0
+            current.append(op)
+            current_bytes += op_bytes
+
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def _commit_batch(db, ops):
+        batch = db.batch()
+        for action, ref, data in ops:
+            if action == "set":
+                batch.set(ref, data)
+            elif action == "update":
+                batch.update(ref, data)
+            elif action == "delete":
+                batch.delete(ref)
+            else:
+                raise ValueError(f"Unknown write action: {action}")
+        batch.commit()
+
+    @staticmethod
+    def _write_with_sdk(db, ops):
+        """Hand every op to the SDK BulkWriter, which batches, throttles and retries"""
+        writer = db.bulk_writer()
+        failures = []
+
+        def on_error(error, _writer):
+            if error.attempts <= Config.FIRESTORE_COMMIT_RETRIES:
+                return True
+            failures.append(error)
+            return False
+
+        writer.on_write_error(on_error)
+        for action, ref, data in ops:
+            if action == "set":
+                writer.set(ref, data)
+            elif action == "update":
+                writer.update(ref, data)
+            elif action == "delete":
+                writer.delete(ref)
+            else:
+                raise ValueError(f"Unknown write action: {action}")
+        writer.close()
+
+        if failures:
+            raise RuntimeError(f"{len(failures)} bulk writes failed: {failures[0].message}")
+
+    async def _commit_with_retry(self, db, ops, semaphore):
+        async with semaphore:
+            for attempt in range(Config.FIRESTORE_COMMIT_RETRIES + 1):
+                try:
+                    await firebase_client.run(self._commit_batch, db, ops)
+                    return
+                except Exception as e:
+                    if attempt == Config.FIRESTORE_COMMIT_RETRIES:
+                        raise
+                    delay = Config.FIRESTORE_RETRY_BASE_DELAY * (2 ** attempt)
+                    delay += random.uniform(0, delay)
+                    print(f"⚠️ Batch of {len(ops)} writes failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+    async def write(self, ops, label: str = "writes"):
+        """
+        Commit ops in bounded batches with a bounded number in flight
+
+        Args:
+            ops: List[Tuple[str, DocumentReference, Optional[dict]]] - Writes to apply
+            label: str - Name used in log output
+
+        Returns:
+            dict: Write count, batch count, elapsed seconds and writes/sec
+        """
+        db = firebase_client.db
+        if not db:
+            raise RuntimeError("Firebase not initialized")
+
+        ops = list(ops)
+        start_time = time.perf_counter()
+
+        if Config.FIRESTORE_USE_BULK_WRITER and hasattr(db, "bulk_writer"):
+            await firebase_client.run(self._write_with_sdk, db, ops)
+            batch_count = None
+        else:
+            batches = self.split_batches(ops)
+            semaphore = asyncio.Semaphore(Config.FIRESTORE_MAX_IN_FLIGHT)
+            await asyncio.gather(*[
+                self._commit_with_retry(db, batch, semaphore) for batch in batches
+            ])
+            batch_count = len(batches)
+
+        elapsed = time.perf_counter() - start_time
+        stats = {
+            "writes": len(ops),
+            "batches": batch_count,
+            "seconds": round(elapsed, 3),
+            "writesPerSecond": round(len(ops) / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        via = "BulkWriter" if batch_count is None else f"{batch_count} batches"
+        print(f"💾 Committed {len(ops)} {label} via {via} "
+              f"in {elapsed:.2f}s ({stats['writesPerSecond']} writes/sec)")
+        return stats
+
+# Singleton instance
+bulk_writer = BulkWriter()
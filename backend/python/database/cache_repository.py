@@ -1,16 +1,22 @@
 """
 Question caching and history repository
 """
+import asyncio
 import re
 import hashlib
-import numpy as np
 from firebase_admin import firestore
 from database.firebase_client import firebase_client
-from services.embedding_service import embedding_service
-from utils.entity_extractor import extract_entities, entities_match
+from database.write_behind import write_behind
+from services.question_index import question_index
+from utils.entity_extractor import extract_entities
+from utils.lru_cache import TTLCache
+from utils.vector_codec import encode_embedding, strip_embedding
 from config import Config
 
 class CacheRepository:
+    # Hot answers by fingerprint, so exact repeats skip Firestore entirely
+    answer_cache = TTLCache(Config.ANSWER_CACHE_SIZE, Config.ANSWER_CACHE_TTL)
+    
     @staticmethod
     def normalize_question(question: str) -> str:
         """Normalize question for fingerprint comparison"""
@@ -23,13 +29,18 @@ class CacheRepository:
         return hashlib.sha256(normalized.encode()).hexdigest()
     
     @staticmethod
-    async def find_similar_question(question: str, question_embedding, intent: str, 
-                                    threshold: float = None):
+    async def find_exact_question(question: str):
         """
-        Find cached similar question using fingerprint and semantic similarity
+        Find cached question by exact fingerprint match
+        
+        Needs no embedding, so callers can check it before any model inference.
+        Served from the in-process answer cache when possible.
         """
-        if threshold is None:
-            threshold = Config.SIMILARITY_THRESHOLD
+        fingerprint = CacheRepository.question_fingerprint(question)
+        hot = CacheRepository.answer_cache.get(fingerprint)
+        if hot is not None:
+            print("⚡ Hot answer cache hit")
+            return hot
         
         db = firebase_client.db
         if not db:
@@ -37,64 +48,74 @@ class CacheRepository:
             return None
         
         try:
-            fingerprint = CacheRepository.question_fingerprint(question)
-            entities = extract_entities(question)
-            
             print(f"🔍 Looking for cache hit - Fingerprint: {fingerprint[:8]}...")
             
-            # 1️⃣ FAST PATH - exact fingerprint match
-            exact_match = db.collection("questions") \
-                .where("fingerprint", "==", fingerprint) \
-                .limit(1) \
-                .stream()
+            exact_match = await firebase_client.stream(
+                db.collection("questions")
+                .where("fingerprint", "==", fingerprint)
+                .limit(1)
+            )
             
             for doc in exact_match:
                 data = doc.to_dict()
+                strip_embedding(data)
                 print("♻️ Exact fingerprint cache hit")
-                return {
+                match = {
                     "id": doc.id,
                     **data,
                     "similarity": 1.0
                 }
+                CacheRepository.answer_cache.set(fingerprint, match)
+                return match
             
-            # 2️⃣ ENTITY-AWARE SEMANTIC MATCH
-            candidates = db.collection("questions") \
-                .where("intent", "==", intent) \
-                .stream()
+            return None
             
-            best_match = None
-            highest_similarity = threshold
-            candidates_checked = 0
+        except Exception as e:
+            print(f"❌ Error finding exact question: {e}")
+            return None
+    
+    @staticmethod
+    async def find_semantic_question(question: str, question_embedding, intent: str, 
+                                     threshold: float = None):
+        """
+        Find cached question with the same intent and entities by semantic similarity
+        """
+        if threshold is None:
+            threshold = Config.SIMILARITY_THRESHOLD
+        
+        db = firebase_client.db
+        if not db:
+            print("⚠️ Firebase not available for cache lookup")
+            return None
+        
+        try:
+            entities = extract_entities(question)
             
-            for doc in candidates:
-                candidates_checked += 1
-                data = doc.to_dict()
-                if "embedding" not in data:
-                    continue
-                
-                # 🚫 Entity mismatch = hard reject
-                if not entities_match(entities, data.get("entities", {})):
-                    continue
-                
-                stored_embedding = np.array(data["embedding"])
-                similarity = embedding_service.cosine_similarity(
-                    question_embedding, 
-                    stored_embedding
-                )
-                
-                if similarity > highest_similarity:
-                    highest_similarity = similarity
-                    best_match = {
-                        "id": doc.id,
-                        **data,
-                        "similarity": float(similarity)
-                    }
+            # In-memory question index, bucketed by intent and entities
+            if not question_index.is_loaded:
+                await firebase_client.run(question_index.load)
             
+            best = await asyncio.to_thread(question_index.find_best, question_embedding, intent, entities)
+            candidates_checked = best[2] if best else 0
             print(f"📊 Checked {candidates_checked} candidates with intent '{intent}'")
             
-            if best_match:
-                print(f"✅ Entity-aware cache hit (similarity: {best_match['similarity']:.3f})")
-                return best_match
+            if best and best[1] > threshold:
+                question_id, similarity, _ = best
+                doc = await firebase_client.run(db.collection("questions").document(question_id).get)
+                if doc.exists:
+                    data = doc.to_dict()
+                    strip_embedding(data)
+                    print(f"✅ Entity-aware cache hit (similarity: {similarity:.3f})")
+                    match = {
+                        "id": doc.id,
+                        **data,
+                        "similarity": similarity
+                    }
+                    # Repeats of this exact wording become hot-cache hits
+                    CacheRepository.answer_cache.set(
+                        CacheRepository.question_fingerprint(question), match
+                    )
+                    return match
             
             print("🔍 No suitable cache hit found")
             return None
@@ -103,11 +124,30 @@ class CacheRepository:
             print(f"❌ Error finding similar question: {e}")
             return None
     
+    @staticmethod
+    async def find_similar_question(question: str, question_embedding, intent: str, 
+                                    threshold: float = None):
+        """
+        Find cached similar question using fingerprint and semantic similarity
+        """
+        # 1️⃣ FAST PATH - exact fingerprint match
+        exact = await CacheRepository.find_exact_question(question)
+        if exact:
+            return exact
+        
+        # 2️⃣ ENTITY-AWARE SEMANTIC MATCH
+        return await CacheRepository.find_semantic_question(
+            question, question_embedding, intent, threshold
+        )
+    
     @staticmethod
     async def store_question(question: str, embedding, answer: str, intent: str, 
                             confidence: dict, sources: list, deadline=None):
         """
         Store new question in cache with proper confidence data
+        
+        The Firestore write is queued on the write-behind pipeline; the ID is
+        generated client-side and the in-process indexes are updated at once.
         """
         db = firebase_client.db
         if not db:
@@ -126,7 +166,7 @@ class CacheRepository:
                 "question": question,
                 "fingerprint": fingerprint,
                 "entities": entities,
-                "embedding": embedding.tolist(),
+                **encode_embedding(embedding),
                 "answer": answer,
                 "intent": intent,
                 "confidence": {
@@ -143,30 +183,44 @@ class CacheRepository:
             
             print(f"💾 Storing question with confidence: {confidence.get('level')} ({confidence.get('score')}%)")
             
-            doc_ref = db.collection("questions").add(question_data)
-            question_id = doc_ref[1].id
-            print(f"✅ Question stored with ID: {question_id}")
+            doc_ref = db.collection("questions").document()
+            question_id = doc_ref.id
+            await write_behind.enqueue("set", doc_ref, question_data)
+            await asyncio.to_thread(question_index.add, question_id, embedding, intent, entities)
+            CacheRepository.answer_cache.set(fingerprint, {
+                "id": question_id,
+                "question": question,
+                "answer": answer,
+                "intent": intent,
+                "confidence": question_data["confidence"],
+                "sources": sources,
+                "deadline": deadline,
+                "similarity": 1.0
+            })
+            print(f"✅ Question queued for storage with ID: {question_id}")
             return question_id
             
         except Exception as e:
             print(f"❌ Error storing question: {e}")
             return None
     
+    @staticmethod
+    def invalidate_answers():
+        """Drop every hot answer, e.g. after documents are reprocessed"""
+        CacheRepository.answer_cache.clear()
+        print("🧹 Cleared hot answer cache")
+    
     @staticmethod
     async def increment_question_count(question_id: str):
-        """Increment count for cached question"""
+        """Increment count for cached question (coalesced on the write-behind pipeline)"""
         db = firebase_client.db
         if not db:
             print("⚠️ Firebase not available for incrementing count")
             return
         
         try:
-            doc_ref = db.collection('questions').document(question_id)
-            doc_ref.update({
-                'count': firestore.Increment(1),
-                'lastAskedAt': firestore.SERVER_TIMESTAMP,
-            })
-            print(f"📈 Incremented count for question: {question_id}")
+            write_behind.increment(question_id)
+            print(f"📈 Queued count increment for question: {question_id}")
         except Exception as e:
             print(f"❌ Error incrementing question count: {e}")
     
@@ -175,7 +229,11 @@ class CacheRepository:
                                    answer: str = None, intent: str = None, 
                                    confidence: dict = None, sources: list = None,
                                    favorite: bool = False, personal_note: str = None):
-        """Store user question in history with full data including favorite status and notes"""
+        """
+        Store user question in history with full data including favorite status and notes
+        
+        The write is queued on the write-behind pipeline.
+        """
         db = firebase_client.db
         if not db:
             print("⚠️ Firebase not available for storing user question")
@@ -195,9 +253,10 @@ class CacheRepository:
                 'askedAt': firestore.SERVER_TIMESTAMP,
             }
             
-            doc_ref = db.collection('user_questions').add(user_question_data)
-            print(f"📝 Stored user question history for user: {user_id}, history ID: {doc_ref[1].id}")
-            return doc_ref[1].id
+            doc_ref = db.collection('user_questions').document()
+            await write_behind.enqueue("set", doc_ref, user_question_data)
+            print(f"📝 Queued user question history for user: {user_id}, history ID: {doc_ref.id}")
+            return doc_ref.id
         except Exception as e:
             print(f"❌ Error storing user question: {e}")
             return None
@@ -212,7 +271,7 @@ class CacheRepository:
         
         try:
             doc_ref = db.collection('user_questions').document(history_id)
-            doc = doc_ref.get()
+            doc = await firebase_client.run(doc_ref.get)
             
             if not doc.exists:
                 print(f"⚠️ History item {history_id} not found")
@@ -226,7 +285,7 @@ class CacheRepository:
             current_favorite = doc_data.get('favorite', False)
             new_favorite = not current_favorite
             
-            doc_ref.update({'favorite': new_favorite})
+            await firebase_client.run(doc_ref.update, {'favorite': new_favorite})
             print(f"⭐ Toggled favorite for {history_id}: {new_favorite}")
             return new_favorite
             
@@ -244,7 +303,7 @@ class CacheRepository:
         
         try:
             doc_ref = db.collection('user_questions').document(history_id)
-            doc = doc_ref.get()
+            doc = await firebase_client.run(doc_ref.get)
             
             if not doc.exists:
                 print(f"⚠️ History item {history_id} not found")
@@ -255,7 +314,7 @@ class CacheRepository:
                 print(f"⚠️ User {user_id} not authorized to modify history {history_id}")
                 return False
             
-            doc_ref.update({
+            await firebase_client.run(doc_ref.update, {
                 'personalNote': note,
                 'noteUpdatedAt': firestore.SERVER_TIMESTAMP
             })
@@ -276,7 +335,7 @@ class CacheRepository:
         
         try:
             doc_ref = db.collection('user_questions').document(history_id)
-            doc = doc_ref.get()
+            doc = await firebase_client.run(doc_ref.get)
             
             if not doc.exists:
                 print(f"⚠️ History item {history_id} not found")
@@ -287,7 +346,7 @@ class CacheRepository:
                 print(f"⚠️ User {user_id} not authorized to delete history {history_id}")
                 return False
             
-            doc_ref.delete()
+            await firebase_client.run(doc_ref.delete)
             print(f"🗑️ Deleted history item {history_id} for user {user_id}")
             return True
             
@@ -307,7 +366,7 @@ class CacheRepository:
             questions_ref = db.collection('questions') \
                 .order_by('count', direction=firestore.Query.DESCENDING) \
                 .limit(limit)
-            questions = questions_ref.stream()
+            questions = await firebase_client.stream(questions_ref)
             
             faqs = []
             for doc in questions:
@@ -351,7 +410,7 @@ class CacheRepository:
             
             query = query.order_by('askedAt', direction=firestore.Query.DESCENDING).limit(limit)
             
-            user_questions = query.stream()
+            user_questions = await firebase_client.stream(query)
             
             history = []
             for doc in user_questions:
@@ -32,7 +32,7 @@ class ChatRepository:
                 'messageCount': 0
             }
             
-            doc_ref = db.collection('chats').add(chat_data)
+            doc_ref = await firebase_client.run(db.collection('chats').add, chat_data)
             chat_id = doc_ref[1].id
             print(f"✅ Chat created with ID: {chat_id}")
             return chat_id
@@ -64,7 +64,7 @@ class ChatRepository:
                 .order_by('updatedAt', direction=firestore.Query.DESCENDING) \
                 .limit(limit)
             
-            chats = query.stream()
+            chats = await firebase_client.stream(query)
             
             chat_list = []
             for chat in chats:
@@ -106,7 +106,7 @@ class ChatRepository:
             
             # Step 1: Verify the chat exists and belongs to the user
             chat_ref = db.collection('chats').document(chat_id)
-            chat_doc = chat_ref.get()
+            chat_doc = await firebase_client.run(chat_ref.get)
             
             if not chat_doc.exists:
                 print(f"⚠️ Chat {chat_id} not found")
@@ -125,8 +125,7 @@ class ChatRepository:
             deleted_messages = 0
             while True:
                 # Get messages in batches
-                messages_batch = messages_ref.limit(500).stream()
-                messages_list = list(messages_batch)
+                messages_list = await firebase_client.stream(messages_ref.limit(500))
                 
                 if not messages_list:
                     break
@@ -137,13 +136,13 @@ class ChatRepository:
                     batch.delete(msg.reference)
                     deleted_messages += 1
                 
-                batch.commit()
+                await firebase_client.run(batch.commit)
                 print(f"   Deleted {deleted_messages} messages so far...")
             
             print(f"✅ Deleted {deleted_messages} messages")
             
             # Step 3: Delete the chat document itself
-            chat_ref.delete()
+            await firebase_client.run(chat_ref.delete)
             print(f"✅ Deleted chat document {chat_id}")
             
             print(f"🎉 Successfully deleted chat {chat_id} with {deleted_messages} messages")
@@ -181,7 +180,7 @@ class ChatRepository:
                 title = title[:47] + "..."
             
             chat_ref = db.collection('chats').document(chat_id)
-            chat_ref.update({
+            await firebase_client.run(chat_ref.update, {
                 'title': title,
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
@@ -212,7 +211,7 @@ class ChatRepository:
         
         try:
             chat_ref = db.collection('chats').document(chat_id)
-            chat_doc = chat_ref.get()
+            chat_doc = await firebase_client.run(chat_ref.get)
             
             if not chat_doc.exists:
                 print(f"⚠️ Chat {chat_id} not found")
@@ -223,7 +222,7 @@ class ChatRepository:
                 print(f"⚠️ User {user_id} not authorized to update chat {chat_id}")
                 return False
             
-            chat_ref.update({
+            await firebase_client.run(chat_ref.update, {
                 'title': title,
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
@@ -266,12 +265,12 @@ class ChatRepository:
             if metadata:
                 message_data['metadata'] = metadata
             
-            doc_ref = db.collection('chat_messages').add(message_data)
+            doc_ref = await firebase_client.run(db.collection('chat_messages').add, message_data)
             message_id = doc_ref[1].id
             
             # Update chat's updatedAt and messageCount
             chat_ref = db.collection('chats').document(chat_id)
-            chat_ref.update({
+            await firebase_client.run(chat_ref.update, {
                 'updatedAt': firestore.SERVER_TIMESTAMP,
                 'messageCount': firestore.Increment(1)
             })
@@ -306,7 +305,7 @@ class ChatRepository:
                 .order_by('createdAt', direction=firestore.Query.ASCENDING) \
                 .limit(limit)
             
-            messages = query.stream()
+            messages = await firebase_client.stream(query)
             
             message_list = []
             for msg in messages:
@@ -0,0 +1,100 @@
+"""
+Cached document metadata lookups
+"""
+import asyncio
+from database.firebase_client import firebase_client
+from utils.lru_cache import TTLCache
+from config import Config
+
+_MISSING = {}  # cached result for documents that don't exist
+
+
+class DocumentRepository:
+    """
+    Document name and fileUrl, cached with a TTL
+
+    Misses are resolved together with one db.get_all call, and lookups that
+    arrive while a fetch is running join it instead of issuing their own.
+    """
+
+    FIELDS = ["name", "fileUrl"]
+
+    def __init__(self):
+        self.metadata_cache = TTLCache(Config.DOCUMENT_CACHE_SIZE, Config.DOCUMENT_CACHE_TTL)
+        self._inflight = {}
+
+    @staticmethod
+    def _fetch(doc_ids):
+        db = firebase_client.db
+        refs = [db.collection('documents').document(doc_id) for doc_id in doc_ids]
+        found = {snapshot.id: snapshot.to_dict() or _MISSING
+                 for snapshot in db.get_all(refs, field_paths=DocumentRepository.FIELDS)
+                 if snapshot.exists}
+        return {doc_id: found.get(doc_id, _MISSING) for doc_id in doc_ids}
+
+    async def _fetch_and_cache(self, doc_ids):
+        results = await firebase_client.run(self._fetch, doc_ids)
+        for doc_id, metadata in results.items():
+            self.metadata_cache.set(doc_id, metadata)
+        return results
+
+    def prefetch(self, doc_ids) -> dict:
+        """
+        Start fetching any uncached documents without waiting for them
+
+        Returns:
+            dict: Cached metadata for the ids that were already known
+        """
+        known, missing = {}, []
+        for doc_id in dict.fromkeys(d for d in doc_ids if d):
+            metadata = self.metadata_cache.get(doc_id)
+            if metadata is not None:
+                known[doc_id] = metadata
+            elif doc_id not in self._inflight:
+                missing.append(doc_id)
+
+        if missing and firebase_client.db:
+            task = asyncio.ensure_future(self._fetch_and_cache(missing))
+            for doc_id in missing:
+                self._inflight[doc_id] = task
+
+            def release(_):
+                if not task.cancelled():
+                    task.exception()  # failures reach the callers that awaited it
+                for doc_id in missing:
+                    if self._inflight.get(doc_id) is task:
+                        del self._inflight[doc_id]
+            task.add_done_callback(release)
+        return known
+
+    async def get_many(self, doc_ids) -> dict:
+        """
+        Get metadata for several documents with at most one Firestore round trip
+
+        Args:
+            doc_ids: Iterable[str] - Document identifiers
+
+        Returns:
+            dict: documentId -> {"name", "fileUrl"} (empty for missing documents)
+        """
+        doc_ids = list(dict.fromkeys(d for d in doc_ids if d))
+        results = self.prefetch(doc_ids)
+        pending = {doc_id: self._inflight.get(doc_id) for doc_id in doc_ids if doc_id not in results}
+        for doc_id, task in pending.items():
+            if task is None:
+                results[doc_id] = _MISSING
+                continue
+            # Shielded, so a caller that times out doesn't cancel a shared fetch
+            results[doc_id] = (await asyncio.shield(task)).get(doc_id, _MISSING)
+        return results
+
+    async def get(self, doc_id: str) -> dict:
+        """Get metadata for one document (empty if it doesn't exist)"""
+        return (await self.get_many([doc_id])).get(doc_id, _MISSING)
+
+    def invalidate(self, doc_id: str):
+        """Forget cached metadata after the document changes"""
+        self.metadata_cache.invalidate(doc_id)
+
+# Singleton instance
+document_repository = DocumentRepository()
@@ -1,6 +1,10 @@
 """
 Firebase client initialization and connection management
 """
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import firebase_admin
 from firebase_admin import credentials, firestore
 from config import Config
@@ -16,25 +20,56 @@ class FirebaseClient:
         return cls._instance
     
     def _initialize(self):
-        """Initialize Firebase Admin SDK"""
-        try:
-            cred = credentials.Certificate(Config.get_firebase_credentials())
-            firebase_admin.initialize_app(cred)
-            self._db = firestore.client()
-            print("✅ Firebase initialized")
-        except Exception as e:
-            print(f"⚠️ Firebase initialization error: {e}")
-            self._db = None
+        """Create the Firestore thread pool; the SDK connects on first use"""
+        # The Admin SDK client is synchronous; every call runs on this pool
+        # so it never blocks the event loop
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.FIRESTORE_THREAD_POOL_SIZE,
+            thread_name_prefix="firestore"
+        )
+        self._connect_lock = threading.Lock()
+        self._connect_attempted = False
+    
+    def connect(self):
+        """Initialize Firebase Admin SDK (once; safe to call from any thread)"""
+        if self._connect_attempted:
+            return
+        with self._connect_lock:
+            if self._connect_attempted:
+                return
+            try:
+                cred = credentials.Certificate(Config.get_firebase_credentials())
+                firebase_admin.initialize_app(cred)
+                self._db = firestore.client()
+                print("✅ Firebase initialized")
+            except Exception as e:
+                print(f"⚠️ Firebase initialization error: {e}")
+                self._db = None
+            self._connect_attempted = True
     
     @property
     def db(self):
         """Get Firestore database client"""
+        self.connect()
         return self._db
     
     @property
     def is_connected(self):
-        """Check if Firebase is connected"""
-        return self._db is not None
+        """Check if Firebase is connected (never connects; await startup.get("firestore") first)"""
+        return self._connect_attempted and self._db is not None
+    
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking Firestore call on the Firestore thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+    
+    async def stream(self, query):
+        """Fetch every document of a query on the Firestore thread pool"""
+        return await self.run(lambda: list(query.stream()))
+    
+    def shutdown(self):
+        """Stop the Firestore thread pool"""
+        self._executor.shutdown(wait=False)
 
 # Singleton instance
 firebase_client = FirebaseClient()
\ No newline at end of file
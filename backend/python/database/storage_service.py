@@ -1,16 +1,23 @@
 """
 Firebase storage service for chunks and documents
 """
+import uuid
 import numpy as np
-from typing import List, Dict
+from typing import List, Dict, Tuple
 from firebase_admin import firestore
 from database.firebase_client import firebase_client
+from database.bulk_writer import bulk_writer
+from database.document_repository import document_repository
 from langchain_core.documents import Document
+from services.page_manifest import image_chunk_content
+from utils.vector_codec import encode_embedding
+from config import Config
 
 class StorageService:
     @staticmethod
     async def store_chunks(doc_id: str, all_docs: List[Document], 
-                          all_embeddings: np.ndarray):
+                          all_embeddings: np.ndarray,
+                          chunk_ids: List[str] = None):
         """
         Store document chunks and embeddings in Firebase
         NO image data stored - only embeddings and metadata
@@ -19,50 +26,173 @@ class StorageService:
             doc_id: str - Document identifier
             all_docs: List[Document] - Document chunks
             all_embeddings: np.ndarray - Chunk embeddings
+            chunk_ids: List[str] - Document IDs to write (default auto-generated)
+            
+        Returns:
+            List[str]: IDs of the stored chunks, in input order
         """
         db = firebase_client.db
         if not db:
             print("⚠️ Firebase not available")
-            return
+            return []
         
         try:
-            batch = db.batch()
+            ops = []
+            stored_ids = []
             
             for idx, (doc, embedding) in enumerate(zip(all_docs, all_embeddings)):
-                chunk_ref = db.collection('chunks').document()
+                if chunk_ids is not None:
+                    chunk_ref = db.collection('chunks').document(chunk_ids[idx])
+                else:
+                    chunk_ref = db.collection('chunks').document()
+                stored_ids.append(chunk_ref.id)
                 
                 chunk_data = {
                     'documentId': doc_id,
-                    'index': idx,
                     'content': doc.page_content,
                     'type': doc.metadata.get('type', 'text'),
-                    'embedding': embedding.tolist(),
+                    **encode_embedding(embedding),
                     'metadata': {
                         'pageNumber': doc.metadata.get('page'),
                         'imageId': doc.metadata.get('image_id'),
                         'xref': doc.metadata.get('xref'),  # ✅ Store PyMuPDF xref for re-extraction
+                        'window': doc.metadata.get('window'),  # sub-window of a multi-vector chunk
                     },
                     'createdAt': firestore.SERVER_TIMESTAMP,
                     'isMultiModal': True
                 }
                 
-                batch.set(chunk_ref, chunk_data)
+                ops.append(("set", chunk_ref, chunk_data))
             
-            batch.commit()
+            await bulk_writer.write(ops, label="chunks")
             print(f"✅ Stored {len(all_docs)} chunks in Firebase (embeddings only)")
+            return stored_ids
             
         except Exception as e:
             print(f"❌ Error storing chunks: {e}")
             raise
     
     @staticmethod
-    async def update_document_status(doc_id: str, all_docs: List[Document]):
+    async def delete_chunks(chunk_ids: List[str]):
+        """
+        Delete chunks by ID in bulk
+        
+        Args:
+            chunk_ids: List[str] - Chunk document IDs
+        """
+        db = firebase_client.db
+        if not db or not chunk_ids:
+            return
+        
+        ops = [("delete", db.collection('chunks').document(chunk_id), None) for chunk_id in chunk_ids]
+        await bulk_writer.write(ops, label="stale chunks")
+        print(f"🗑️ Deleted {len(chunk_ids)} stale chunks")
+    
+    @staticmethod
+    async def list_chunk_ids(doc_id: str) -> List[str]:
+        """IDs of every stored chunk of a document (no fields are read)"""
+        db = firebase_client.db
+        if not db:
+            return []
+        
+        query = db.collection('chunks').where('documentId', '==', doc_id).select([])
+        return [snapshot.id for snapshot in await firebase_client.stream(query)]
+    
+    @staticmethod
+    async def move_chunks(moves: List[Tuple[str, int, str]]):
+        """
+        Rewrite the page number of chunks whose page moved (no re-embedding)
+        
+        Args:
+            moves: List[Tuple[str, int, str]] - (chunk ID, new 0-indexed page, chunk type)
+        """
+        db = firebase_client.db
+        if not db or not moves:
+            return
+        
+        ops = []
+        for chunk_id, page, chunk_type in moves:
+            fields = {'metadata.pageNumber': page}
+            if chunk_type == 'image':
+                fields['content'] = image_chunk_content(page)
+            ops.append(("update", db.collection('chunks').document(chunk_id), fields))
+        await bulk_writer.write(ops, label="moved chunks")
+        print(f"📑 Renumbered {len(moves)} chunks of moved pages")
+    
+    @staticmethod
+    async def get_page_manifest(doc_id: str):
+        """
+        Per-page hashes and chunk IDs from the last ingestion
+        
+        Pages are stored MANIFEST_PAGES_PER_PART at a time in a 'parts'
+        subcollection, so large documents stay under Firestore's document
+        size limit. Parts from an unfinished save are ignored.
+        
+        Returns:
+            Optional[List[Dict]]: Manifest pages, or None if the document has
+            no complete manifest
+        """
+        db = firebase_client.db
+        if not db:
+            return None
+        
+        manifest_ref = db.collection('pageManifests').document(doc_id)
+        snapshot = await firebase_client.run(manifest_ref.get)
+        manifest = snapshot.to_dict() if snapshot.exists else None
+        if not manifest or 'runId' not in manifest:
+            return None
+        
+        parts = [part.to_dict() for part in await firebase_client.stream(manifest_ref.collection('parts'))]
+        parts = sorted((p for p in parts if p.get('runId') == manifest['runId']), key=lambda p: p['part'])
+        pages = [page for part in parts for page in part.get('pages', [])]
+        if len(pages) != manifest.get('pageCount'):
+            print(f"⚠️ Incomplete page manifest for {doc_id}, reprocessing every page")
+            return None
+        return pages
+    
+    @staticmethod
+    async def save_page_manifest(doc_id: str, pages: List[Dict]):
+        """Store the manifest of a successful ingestion"""
+        db = firebase_client.db
+        if not db:
+            return
+        
+        manifest_ref = db.collection('pageManifests').document(doc_id)
+        snapshot = await firebase_client.run(manifest_ref.get)
+        old_parts = (snapshot.to_dict() or {}).get('partCount', 0) if snapshot.exists else 0
+        
+        run_id = uuid.uuid4().hex
+        size = Config.MANIFEST_PAGES_PER_PART
+        parts = [pages[start:start + size] for start in range(0, len(pages), size)]
+        ops = [
+            ("set", manifest_ref.collection('parts').document(str(i)),
+             {'runId': run_id, 'part': i, 'pages': part})
+            for i, part in enumerate(parts)
+        ]
+        ops += [
+            ("delete", manifest_ref.collection('parts').document(str(i)), None)
+            for i in range(len(parts), old_parts)
+        ]
+        await bulk_writer.write(ops, label="page manifest")
+        
+        # Written last, so readers only trust parts from a finished save
+        await firebase_client.run(manifest_ref.set, {
+            'documentId': doc_id,
+            'runId': run_id,
+            'pageCount': len(pages),
+            'partCount': len(parts),
+            'updatedAt': firestore.SERVER_TIMESTAMP,
+        })
+    
+    @staticmethod
+    async def update_document_status(doc_id: str, text_chunks: int, visual_chunks: int):
         """
         Update document processing status in Firebase
         
         Args:
             doc_id: str - Document identifier
-            all_docs: List[Document] - Processed document chunks
+            text_chunks: int - Number of text chunks stored
+            visual_chunks: int - Number of image chunks stored
         """
         db = firebase_client.db
         if not db:
@@ -70,14 +200,15 @@ class StorageService:
         
         try:
             doc_ref = db.collection("documents").document(doc_id)
-            doc_ref.update({
+            await firebase_client.run(doc_ref.update, {
                 "status": "Processed",
                 "processedAt": firestore.SERVER_TIMESTAMP,
-                "chunksCount": len(all_docs),
-                "textChunks": len([d for d in all_docs if d.metadata.get("type") == "text"]),
-                "visualChunks": len([d for d in all_docs if d.metadata.get("type") == "image"]),
+                "chunksCount": text_chunks + visual_chunks,
+                "textChunks": text_chunks,
+                "visualChunks": visual_chunks,
                 "isMultiModal": True,
             })
+            document_repository.invalidate(doc_id)
             print(f"✅ Updated document status: {doc_id}")
         except Exception as e:
             print(f"Error updating document status: {e}")
@@ -0,0 +1,190 @@
+"""
+Write-behind queue for bookkeeping writes on the request path
+"""
+import asyncio
+import time
+from firebase_admin import firestore
+from database.firebase_client import firebase_client
+from database.bulk_writer import bulk_writer
+from config import Config
+
+
+class WriteBehindQueue:
+    """
+    Buffers writes that don't affect the response and commits them in
+    batches from a background task
+
+    Question count increments are coalesced per question id into a single
+    Increment(n) update per flush. The queue is bounded: when it is full,
+    enqueue waits, and the time spent waiting is reported as backpressure.
+    Writes from a failed flush are retried on the following flushes, up to
+    WRITE_BEHIND_MAX_RETRIES times, before they are dropped.
+    """
+
+    def __init__(self):
+        self._queue = None
+        self._increments = {}
+        self._retry = []  # (op, attempts) carried over from failed flushes
+        self._task = None
+        self._wakeup = None
+        self._stopping = False
+        self._metrics = {
+            "enqueued": 0,
+            "incrementsRequested": 0,
+            "written": 0,
+            "retried": 0,
+            "failed": 0,
+            "flushes": 0,
+            "backpressureWaits": 0,
+            "backpressureMs": 0.0,
+            "lastFlushMs": None,
+        }
+
+    def start(self):
+        """Start the background flusher on the running event loop (or restart it if it died)"""
+        if self._task is not None and not self._task.done():
+            return
+        if self._task is not None and not self._task.cancelled() and self._task.exception():
+            print(f"⚠️ Write-behind flusher died ({self._task.exception()}), restarting")
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=Config.WRITE_BEHIND_MAX_PENDING)
+            self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+        print("✍️ Write-behind queue started")
+
+    async def stop(self):
+        """Stop the flusher after it commits everything still pending"""
+        if self._task is None:
+            return
+        if self._task.done():
+            self.start()  # the flusher died; restart it for the final drain
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        print("✍️ Write-behind queue flushed and stopped")
+
+    async def enqueue(self, action: str, ref, data=None):
+        """Queue one write; waits only if the queue is full"""
+        self.start()
+        if self._queue.full():
+            self._metrics["backpressureWaits"] += 1
+            self._wakeup.set()
+            start_time = time.perf_counter()
+            await self._queue.put((action, ref, data))
+            self._metrics["backpressureMs"] += (time.perf_counter() - start_time) * 1000
+        else:
+            self._queue.put_nowait((action, ref, data))
+            if self._queue.qsize() >= Config.FIRESTORE_BATCH_MAX_WRITES:
+                self._wakeup.set()
+        self._metrics["enqueued"] += 1
+
+    def increment(self, question_id: str):
+        """Count one more ask of a cached question (coalesced until the next flush)"""
+        self.start()
+        self._increments[question_id] = self._increments.get(question_id, 0) + 1
+        self._metrics["incrementsRequested"] += 1
+
+    def _drain(self):
+        ops = []
+        while len(ops) < Config.FIRESTORE_BATCH_MAX_WRITES and not self._queue.empty():
+            ops.append((self._queue.get_nowait(), 0))
+        return ops
+
+    def _has_pending(self) -> bool:
+        return not self._queue.empty() or bool(self._retry) or bool(self._increments)
+
+    def _requeue(self, ops, error):
+        """Keep failed writes for the next flush, dropping those out of retries"""
+        retry = [(op, attempts + 1) for op, attempts in ops
+                 if attempts < Config.WRITE_BEHIND_MAX_RETRIES]
+        dropped = len(ops) - len(retry)
+        self._retry.extend(retry)
+        self._metrics["retried"] += len(retry)
+        self._metrics["failed"] += dropped
+        print(f"❌ Write-behind flush of {len(ops)} writes failed ({error}): "
+              f"{len(retry)} will be retried, {dropped} dropped")
+
+    async def _run(self):
+        """Flush every WRITE_BEHIND_FLUSH_INTERVAL, or sooner when a full batch is waiting"""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), Config.WRITE_BEHIND_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush(self._drain())
+
+        # Final drain; give up once flushes keep failing
+        failures = 0
+        while self._has_pending() and failures <= Config.WRITE_BEHIND_MAX_RETRIES:
+            if not await self._flush(self._drain()):
+                failures += 1
+        if self._has_pending():
+            print(f"❌ Write-behind stopped with {self._queue.qsize() + len(self._retry)} writes "
+                  f"and {len(self._increments)} increments unflushed")
+
+    async def _flush(self, ops) -> bool:
+        """
+        Commit queued writes, earlier failures and pending increments
+
+        Never raises: anything that fails is kept for a later flush.
+
+        Returns:
+            bool: False if any write failed
+        """
+        ops, self._retry = self._retry + ops, []
+        increments, self._increments = self._increments, {}
+        if not ops and not increments:
+            return True
+
+        start_time = time.perf_counter()
+        ok = True
+        try:
+            db = firebase_client.db
+            if db is None:
+                raise RuntimeError("Firebase not available")
+            increment_ops = [
+                (("update", db.collection('questions').document(question_id), {
+                    'count': firestore.Increment(count),
+                    'lastAskedAt': firestore.SERVER_TIMESTAMP,
+                }), 0)
+                for question_id, count in increments.items()
+            ]
+        except Exception as e:
+            # Nothing was written; counts go back to be coalesced with new ones
+            for question_id, count in increments.items():
+                self._increments[question_id] = self._increments.get(question_id, 0) + count
+            if ops:
+                self._requeue(ops, e)
+            else:
+                print(f"❌ Write-behind flush failed: {e}")
+            return False
+
+        # Increments go after the queued writes: they may target a question
+        # whose creation is in this same flush
+        for batch in (ops, increment_ops):
+            if not batch:
+                continue
+            try:
+                await bulk_writer.write([op for op, _ in batch], label="deferred writes")
+                self._metrics["written"] += len(batch)
+            except Exception as e:
+                ok = False
+                self._requeue(batch, e)
+        self._metrics["flushes"] += 1
+        self._metrics["lastFlushMs"] = round((time.perf_counter() - start_time) * 1000, 1)
+        return ok
+
+    def stats(self) -> dict:
+        return {
+            **self._metrics,
+            "backpressureMs": round(self._metrics["backpressureMs"], 1),
+            "queueDepth": self._queue.qsize() if self._queue else 0,
+            "retryDepth": len(self._retry),
+            "pendingIncrements": len(self._increments),
+        }
+
+# Singleton instance
+write_behind = WriteBehindQueue()
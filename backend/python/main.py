@@ -3,6 +3,11 @@ Main FastAPI application for the RAG service
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import sys
 import warnings
 import aiohttp
 
@@ -14,13 +19,16 @@ from pydantic import BaseModel
 from config import Config
 from database.firebase_client import firebase_client
 from database.cache_repository import cache_repository
-from database.storage_service import storage_service
+from database.write_behind import write_behind
+from database.document_repository import document_repository
 
-# Services
-from services.embedding_service import embedding_service
-from services.pdf_processor import pdf_processor
-from services.retrieval_service import retrieval_service
-from services.llm_service import llm_service
+# Services - models, PDF handling and langchain are imported by the startup
+# orchestrator in the background, not here, so the app serves immediately
+from services.startup import startup
+from services.http_client import http_client, DownloadTooLargeError
+from services.inference_executor import inference_executor
+from services.page_manifest import IngestPlan, manifest_salt
+from services.thumbnail_store import thumbnail_store
 
 # Utilities
 from utils.intent_detector import detect_intent
@@ -45,8 +53,46 @@ class UpdateNoteRequest(BaseModel):
 # Validate configuration
 Config.validate()
 
+# Heavy components, loaded concurrently once the app is up
+startup.register("firestore", "database.firebase_client", "firebase_client",
+                 load=lambda client: client.connect())
+startup.register("clip", "services.embedding_service", "embedding_service",
+                 load=lambda service: service.load())
+startup.register("gemini", "services.llm_service", "llm_service",
+                 load=lambda service: service.load())
+startup.register("vector_index", "services.vector_index", "vector_index",
+                 load=lambda index: index.load(), depends_on=("firestore",))
+startup.register("question_index", "services.question_index", "question_index",
+                 load=lambda index: index.load(), depends_on=("firestore",))
+startup.register("retrieval", "services.retrieval_service", "retrieval_service",
+                 depends_on=("vector_index",))
+startup.register("ingestion", "services.pdf_processor", "pdf_processor")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background workers and component loading; flush and stop them on shutdown"""
+    await http_client.start()
+    write_behind.start()
+    startup.start()
+    
+    yield
+    
+    # Flush deferred writes and stop workers owned by this app
+    await write_behind.stop()
+    pdf_extraction = sys.modules.get("services.pdf_extraction")
+    if pdf_extraction is not None:
+        pdf_extraction.parallel_extractor.shutdown()
+    embedding_store = sys.modules.get("services.embedding_store")
+    if embedding_store is not None:
+        embedding_store.embedding_store.close()
+    inference_executor.shutdown()
+    firebase_client.shutdown()
+    await http_client.close()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="Campus Intel RAG Service", version="1.0.0")
+app = FastAPI(title="Campus Intel RAG Service", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -61,6 +107,143 @@ app.add_middleware(
 app.include_router(chat_router, tags=["chats"])
 
 
+
+NO_ANSWER = "I couldn't find any relevant information in the documents."
+NO_SOURCES_CONFIDENCE = {"level": "Low", "score": 0, "reasoning": "No relevant sources found"}
+
+
+async def find_cached_answer(request: QueryRequest, intent: str):
+    """
+    Look for a reusable answer: exact fingerprint first, then semantic match
+    
+    Returns:
+        tuple: (cached question or None, query embedding or None)
+    """
+    # Check the exact fingerprint cache before any model inference
+    cached_question = await cache_repository.find_exact_question(request.question)
+    if cached_question:
+        return cached_question, None
+    
+    # Embed the query (repeats reuse the cached embedding)
+    embedding_service = await startup.get("clip")
+    query_embedding = await embedding_service.aembed_query(
+        request.question,
+        cache_repository.question_fingerprint(request.question)
+    )
+    print("✅ Query embedded")
+    
+    await startup.get("question_index")
+    cached_question = await cache_repository.find_semantic_question(
+        request.question,
+        query_embedding,
+        intent
+    )
+    return cached_question, query_embedding
+
+
+async def record_cached_answer(request: QueryRequest, cached_question: dict):
+    """Count the reuse and add it to the user's history; returns the deadline info"""
+    print(f"♻️ Reusing cached answer (similarity: {cached_question.get('similarity', 1.0):.3f})")
+    
+    # Increment count (queued on the write-behind pipeline)
+    await cache_repository.increment_question_count(cached_question['id'])
+    
+    # Store user question with full data (queued on the write-behind pipeline)
+    await cache_repository.store_user_question(
+        request.userId,
+        cached_question['id'],
+        request.question,
+        answer=cached_question['answer'],
+        intent=cached_question.get('intent'),
+        confidence=cached_question.get('confidence'),
+        sources=cached_question.get('sources', [])
+    )
+    
+    # Extract deadline info for cached response
+    return extract_deadline_info(
+        cached_question['answer'],
+        cached_question.get('sources', [])
+    )
+
+
+async def record_no_answer(request: QueryRequest, intent: str, answer: str):
+    """Still store in history even if no answer"""
+    await cache_repository.store_user_question(
+        request.userId,
+        "no_answer",
+        request.question,
+        answer=answer,
+        intent=intent,
+        confidence=NO_SOURCES_CONFIDENCE,
+        sources=[]
+    )
+
+
+async def start_answer_context(question: str, context_docs):
+    """
+    Start building the Gemini message and wait only for the source list
+    
+    Returns:
+        tuple: (task building the message, sources, confidence)
+    """
+    llm_service = await startup.get("gemini")
+    retrieval_service = await startup.get("retrieval")
+    
+    # Both need document metadata - start one batched lookup they can share
+    document_repository.prefetch(doc.metadata.get('documentId') for doc in context_docs)
+    
+    message_task = asyncio.create_task(llm_service.create_multimodal_message(question, context_docs))
+    try:
+        sources = await retrieval_service.prepare_sources(context_docs)
+    except BaseException:
+        message_task.cancel()
+        raise
+    
+    # Calculate confidence
+    confidence = calculate_confidence(sources)
+    print(f"📊 Confidence: {confidence.get('level')} ({confidence.get('score')}%)")
+    return message_task, sources, confidence
+
+
+async def prepare_answer_context(question: str, context_docs):
+    """Build the Gemini message and the source list concurrently"""
+    message_task, sources, confidence = await start_answer_context(question, context_docs)
+    return await message_task, sources, confidence
+
+
+async def record_new_answer(request: QueryRequest, query_embedding, answer: str,
+                            intent: str, confidence: dict, sources: list):
+    """Cache a freshly generated answer and add it to the user's history"""
+    # Extract deadline info
+    deadline = extract_deadline_info(answer, sources)
+    
+    # Store in cache
+    question_id = await cache_repository.store_question(
+        request.question,
+        query_embedding,
+        answer,
+        intent,
+        confidence,
+        sources,
+        deadline=deadline
+    )
+    
+    # Store user question history with full data
+    if question_id:
+        await cache_repository.store_user_question(
+            request.userId,
+            question_id,
+            request.question,
+            answer=answer,
+            intent=intent,
+            confidence=confidence,
+            sources=sources
+        )
+    
+    print(f"✅ Answer generated and cached\n")
+    return deadline
+
+
 @app.post("/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     """
@@ -68,6 +251,7 @@ async def query_documents(request: QueryRequest):
     Re-extracts images on-demand for multimodal responses
     """
     try:
+        await startup.get("firestore")
         if not firebase_client.is_connected:
             raise HTTPException(status_code=500, detail="Firebase not initialized")
         
@@ -78,39 +262,10 @@ async def query_documents(request: QueryRequest):
         intent = detect_intent(request.question)
         print(f"🎯 Detected intent: {intent}")
         
-        # Embed the query
-        query_embedding = embedding_service.embed_text(request.question)
-        print("✅ Query embedded")
-        
-        # Check cache first
-        cached_question = await cache_repository.find_similar_question(
-            request.question,
-            query_embedding,
-            intent
-        )
+        cached_question, query_embedding = await find_cached_answer(request, intent)
         
         if cached_question:
-            print(f"♻️ Reusing cached answer (similarity: {cached_question.get('similarity', 1.0):.3f})")
-            
-            # Increment count
-            await cache_repository.increment_question_count(cached_question['id'])
-            
-            # Store user question with full data
-            await cache_repository.store_user_question(
-                request.userId,
-                cached_question['id'],
-                request.question,
-                answer=cached_question['answer'],
-                intent=cached_question.get('intent'),
-                confidence=cached_question.get('confidence'),
-                sources=cached_question.get('sources', [])
-            )
-            
-            # Extract deadline info for cached response
-            deadline = extract_deadline_info(
-                cached_question['answer'],
-                cached_question.get('sources', [])
-            )
+            deadline = await record_cached_answer(request, cached_question)
             
             return QueryResponse(
                 answer=cached_question['answer'],
@@ -126,78 +281,37 @@ async def query_documents(request: QueryRequest):
         print("🤖 Generating new answer")
         
         # Retrieve relevant chunks
-        context_docs = retrieval_service.retrieve_multimodal(
+        retrieval_service = await startup.get("retrieval")
+        context_docs = await retrieval_service.retrieve_multimodal(
             query_embedding,
             request.documentIds
         )
         
         if not context_docs:
-            response = QueryResponse(
-                answer="I couldn't find any relevant information in the documents.",
+            await record_no_answer(request, intent, NO_ANSWER)
+            return QueryResponse(
+                answer=NO_ANSWER,
                 sources=[],
                 hasVisualContent=False,
                 cached=False,
-                confidence={"level": "Low", "score": 0, "reasoning": "No relevant sources found"}
-            )
-            
-            # Still store in history even if no answer
-            await cache_repository.store_user_question(
-                request.userId,
-                "no_answer",
-                request.question,
-                answer=response.answer,
-                intent=intent,
-                confidence=response.confidence,
-                sources=[]
+                confidence=NO_SOURCES_CONFIDENCE
             )
-            
-            return response
         
         print(f"📚 Retrieved {len(context_docs)} documents")
         
-        # ✅ Create multimodal message with re-extracted images (async)
-        message = await llm_service.create_multimodal_message(request.question, context_docs)
+        # ✅ Create multimodal message with re-extracted images, and prepare sources
+        message, sources, confidence = await prepare_answer_context(request.question, context_docs)
         
         # Generate answer
-        answer = llm_service.generate_answer(message)
-        
-        # Prepare sources
-        sources = retrieval_service.prepare_sources(context_docs)
+        llm_service = await startup.get("gemini")
+        answer = await llm_service.generate_answer(message)
         
         has_visual = any(doc.metadata.get('type') == 'image' for doc in context_docs)
         
-        # Calculate confidence
-        confidence = calculate_confidence(sources)
-        print(f"📊 Confidence: {confidence.get('level')} ({confidence.get('score')}%)")
-        
-        # Extract deadline info
-        deadline = extract_deadline_info(answer, sources)
-        
-        # Store in cache
-        question_id = await cache_repository.store_question(
-            request.question,
-            query_embedding,
-            answer,
-            intent,
-            confidence,
-            sources,
-            deadline=deadline
+        deadline = await record_new_answer(
+            request, query_embedding, answer, intent, confidence, sources
         )
         
-        # Store user question history with full data
-        if question_id:
-            await cache_repository.store_user_question(
-                request.userId,
-                question_id,
-                request.question,
-                answer=answer,
-                intent=intent,
-                confidence=confidence,
-                sources=sources
-            )
-        
-        print(f"✅ Answer generated and cached\n")
-        
         return QueryResponse(
             answer=answer,
             sources=sources,
@@ -207,52 +321,221 @@ async def query_documents(request: QueryRequest):
             confidence=confidence
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error in query: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def sse_event(event: str, data) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.post("/query/stream")
+async def query_documents_stream(request: QueryRequest):
+    """
+    Same as /query, streamed as server-sent events
+    
+    Events, in order:
+        meta:  {sources, confidence, hasVisualContent, cached, similarity}
+        token: {text} - repeated as Gemini produces the answer
+        done:  {deadline}
+        error: {detail} - instead of the remaining events if anything fails
+    """
+    await startup.get("firestore")
+    if not firebase_client.is_connected:
+        raise HTTPException(status_code=500, detail="Firebase not initialized")
+    
+    async def events():
+        try:
+            print(f"\n🔍 Streaming query: {request.question}")
+            print(f"👤 User: {request.userId}")
+            
+            intent = detect_intent(request.question)
+            print(f"🎯 Detected intent: {intent}")
+            
+            cached_question, query_embedding = await find_cached_answer(request, intent)
+            
+            if cached_question:
+                sources = cached_question.get('sources', [])
+                yield sse_event("meta", {
+                    "sources": sources,
+                    "confidence": cached_question.get('confidence'),
+                    "hasVisualContent": any(s.get('type') == 'image' for s in sources),
+                    "cached": True,
+                    "similarity": cached_question.get('similarity'),
+                })
+                yield sse_event("token", {"text": cached_question['answer']})
+                deadline = await record_cached_answer(request, cached_question)
+                yield sse_event("done", {"deadline": deadline})
+                return
+            
+            print("🤖 Generating new answer (streaming)")
+            retrieval_service = await startup.get("retrieval")
+            context_docs = await retrieval_service.retrieve_multimodal(
+                query_embedding,
+                request.documentIds
+            )
+            
+            if not context_docs:
+                yield sse_event("meta", {
+                    "sources": [],
+                    "confidence": NO_SOURCES_CONFIDENCE,
+                    "hasVisualContent": False,
+                    "cached": False,
+                    "similarity": None,
+                })
+                yield sse_event("token", {"text": NO_ANSWER})
+                await record_no_answer(request, intent, NO_ANSWER)
+                yield sse_event("done", {"deadline": None})
+                return
+            
+            print(f"📚 Retrieved {len(context_docs)} documents")
+            message_task, sources, confidence = await start_answer_context(request.question, context_docs)
+            
+            # Sources and confidence go out while the message (image fetches) is still being built
+            try:
+                yield sse_event("meta", {
+                    "sources": sources,
+                    "confidence": confidence,
+                    "hasVisualContent": any(doc.metadata.get('type') == 'image' for doc in context_docs),
+                    "cached": False,
+                    "similarity": None,
+                })
+                message = await message_task
+            finally:
+                message_task.cancel()
+            
+            llm_service = await startup.get("gemini")
+            parts = []
+            async for text in llm_service.stream_answer(message):
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+            
+            deadline = await record_new_answer(
+                request, query_embedding, "".join(parts), intent, confidence, sources
+            )
+            yield sse_event("done", {"deadline": deadline})
+            
+        except Exception as e:
+            print(f"❌ Error in streaming query: {e}")
+            import traceback
+            traceback.print_exc()
+            yield sse_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/process-document")
 async def process_document(request: ProcessDocumentRequest):
     """Process a document and store in Firebase"""
     try:
         print(f"📄 Processing document: {request.documentId}")
         
-        # Download PDF
-        async with aiohttp.ClientSession() as session:
-            async with session.get(request.fileUrl) as response:
-                if response.status != 200:
-                    raise HTTPException(status_code=400, detail="Failed to download PDF")
-                pdf_bytes = await response.read()
+        pdf_processor = await startup.get("ingestion")
+        vector_index = await startup.get("vector_index")
+        await startup.get("clip")
+        
+        # These use PyMuPDF / langchain, which the ingestion component has loaded
+        from database.storage_service import storage_service
+        from services.pdf_cache import pdf_cache, image_cache
+        from services.pdf_extraction import page_hashes
+        
+        # Download PDF over the shared connection pool
+        try:
+            pdf_bytes = await http_client.download(request.fileUrl)
+        except DownloadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except (RuntimeError, aiohttp.ClientError) as e:
+            raise HTTPException(status_code=400, detail=f"Failed to download PDF: {e}")
         
         print(f"✅ Downloaded PDF: {len(pdf_bytes)} bytes")
         
-        # Process PDF - returns (docs, embeddings) only
-        all_docs, all_embeddings = pdf_processor.process_pdf(
-            pdf_bytes,
-            request.documentId
+        # Multimodal answers re-extract images from this file - keep it around
+        await pdf_cache.put(request.fileUrl, pdf_bytes)
+        image_cache.invalidate_document(request.documentId)
+        document_repository.invalidate(request.documentId)
+        
+        # Diff page hashes against the last ingestion - only changed pages are re-embedded
+        hashes, previous = await asyncio.gather(
+            asyncio.to_thread(page_hashes, pdf_bytes, manifest_salt()),
+            storage_service.get_page_manifest(request.documentId)
         )
+        plan = IngestPlan(request.documentId, hashes, previous, force=request.fullReprocess)
+        if not plan.has_manifest:
+            # Ingested before manifests existed (or never): replace whatever is stored
+            plan.add_stale(await storage_service.list_chunk_ids(request.documentId))
+        print(f"🔁 {len(plan.changed_pages)}/{len(hashes)} pages changed, {len(plan.moved_pages)} moved")
+        
+        # Process PDF as a pipeline - each window is stored as soon as it is embedded
+        async def store_batch(docs, embeddings):
+            # Store in Firebase under content-derived IDs - no image data
+            chunk_ids = await storage_service.store_chunks(
+                request.documentId,
+                docs,
+                embeddings,
+                chunk_ids=plan.assign_ids(docs)
+            )
+            
+            # Make the new chunks searchable without reloading the index
+            if chunk_ids:
+                await asyncio.to_thread(vector_index.add_chunks, chunk_ids, request.documentId, docs, embeddings)
         
-        # Store in Firebase - no image data
-        await storage_service.store_chunks(
+        stats = await pdf_processor.process_pdf_streaming(
+            pdf_bytes,
             request.documentId,
-            all_docs,
-            all_embeddings
+            store_batch,
+            pages=plan.changed_pages
         )
         
-        # Update document status
-        await storage_service.update_document_status(request.documentId, all_docs)
+        # Chunks of changed or removed pages
+        stale_ids = plan.ids_to_delete()
+        await storage_service.delete_chunks(stale_ids)
+        await asyncio.to_thread(vector_index.remove_chunks, stale_ids)
+        
+        # Unchanged pages that moved keep their chunks - only the page number changes
+        moves = plan.moves()
+        await storage_service.move_chunks(moves)
+        await asyncio.to_thread(vector_index.move_chunks, moves)
+        
+        # Cached answers may be based on the previous version of the document
+        if plan.changed_pages or stale_ids or moves:
+            cache_repository.invalidate_answers()
+        
+        # Update document status and the manifest for the next run
+        text_chunks, visual_chunks = plan.totals()
+        await asyncio.gather(
+            storage_service.update_document_status(request.documentId, text_chunks, visual_chunks),
+            storage_service.save_page_manifest(request.documentId, plan.manifest())
+        )
         
         return {
             "success": True,
             "documentId": request.documentId,
-            "totalChunks": len(all_docs),
-            "textChunks": len([d for d in all_docs if d.metadata.get("type") == "text"]),
-            "visualChunks": len([d for d in all_docs if d.metadata.get("type") == "image"]),
-            "note": "Images stored as embeddings only"
+            "totalChunks": text_chunks + visual_chunks,
+            "textChunks": text_chunks,
+            "visualChunks": visual_chunks,
+            "pagesTotal": len(hashes),
+            "pagesReprocessed": len(plan.changed_pages),
+            "pagesMoved": len(plan.moved_pages),
+            "chunksEmbedded": stats["totalChunks"],
+            "chunksDeleted": len(stale_ids),
+            "chunksPerSecond": stats["chunksPerSecond"],
+            "thumbnailBytes": stats["thumbnailBytes"],
+            "embeddingCache": stats["embeddingCache"],
+            "note": (f"Images stored as embeddings and {Config.THUMBNAIL_STORE} thumbnails"
+                     if thumbnail_store.enabled else "Images stored as embeddings only")
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Error processing document: {e}")
         import traceback
@@ -267,7 +550,7 @@ async def health_check():
         try:
             db = firebase_client.db
             chunks_ref = db.collection('chunks')
-            chunk_count = len(list(chunks_ref.limit(1000).stream()))
+            chunk_count = len(await firebase_client.stream(chunks_ref.limit(1000)))
         except Exception as e:
             print(f"Error counting chunks: {e}")
     
@@ -279,9 +562,51 @@ async def health_check():
     )
 
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: the process is up and serving, whether or not models have loaded"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: every component has loaded (503 until then, with per-component status)"""
+    status = startup.status()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """In-process performance counters"""
+    metrics = {
+        "startup": startup.status(),
+        "answerCache": cache_repository.answer_cache.stats(),
+        "documentCache": document_repository.metadata_cache.stats(),
+        "writeBehind": write_behind.stats(),
+        "inferenceQueueDepth": inference_executor.pending,
+    }
+    
+    # Model-side counters only exist once those components have loaded
+    if startup.is_ready:
+        from services.pdf_cache import pdf_cache, image_cache
+        from services.embedding_store import embedding_store
+        embedding_service = await startup.get("clip")
+        llm_service = await startup.get("gemini")
+        metrics.update({
+            "queryEmbedding": embedding_service.text_batcher.stats(),
+            "queryEmbeddingCache": embedding_service.query_cache.stats(),
+            "pdfCache": pdf_cache.stats(),
+            "imageCache": image_cache.stats(),
+            "embeddingStore": embedding_store.stats(),
+            "multimodalImages": llm_service.image_stats(),
+        })
+    return metrics
+
+
 @app.get("/faq")
 async def get_faq(limit: int = 10):
     """Get frequently asked questions"""
+    await startup.get("firestore")
     if not firebase_client.is_connected:
         raise HTTPException(status_code=500, detail="Firebase not initialized")
     
@@ -293,6 +618,7 @@ async def get_faq(limit: int = 10):
 async def get_user_history(userId: str, limit: int = 100, favorites_only: bool = False):
     """Get user's question history with optional favorites filter"""
     try:
+        await startup.get("firestore")
         if not firebase_client.is_connected:
             raise HTTPException(status_code=500, detail="Firebase not initialized")
         
@@ -312,6 +638,7 @@ async def get_user_history(userId: str, limit: int = 100, favorites_only: bool =
 async def toggle_favorite(userId: str, historyId: str):
     """Toggle favorite status for a question in user's history"""
     try:
+        await startup.get("firestore")
         if not firebase_client.is_connected:
             raise HTTPException(status_code=500, detail="Firebase not initialized")
         
@@ -338,6 +665,7 @@ async def toggle_favorite(userId: str, historyId: str):
 async def delete_user_question(userId: str, historyId: str):
     """Delete a specific question from user's history"""
     try:
+        await startup.get("firestore")
         if not firebase_client.is_connected:
             raise HTTPException(status_code=500, detail="Firebase not initialized")
         
@@ -364,11 +692,12 @@ async def delete_user_question(userId: str, historyId: str):
 async def check_document_exists(documentId: str):
     """Check if a document exists in Firebase"""
     try:
+        await startup.get("firestore")
         if not firebase_client.is_connected:
             raise HTTPException(status_code=500, detail="Firebase not initialized")
         
         db = firebase_client.db
-        doc_ref = db.collection('documents').document(documentId).get()
+        doc_ref = await firebase_client.run(db.collection('documents').document(documentId).get)
         
         exists = doc_ref.exists
         print(f"📄 Document {documentId} exists: {exists}")
@@ -386,6 +715,7 @@ async def update_personal_note(history_id: str, request: UpdateNoteRequest):
     Update personal note for a history item
     """
     try:
+        await startup.get("firestore")
         if not firebase_client.is_connected:
             raise HTTPException(status_code=500, detail="Firebase not initialized")
         
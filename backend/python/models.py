@@ -7,6 +7,7 @@ from typing import List, Dict, Any, Optional
 class ProcessDocumentRequest(BaseModel):
     documentId: str
     fileUrl: str
+    fullReprocess: Optional[bool] = False  # ignore the page manifest and re-embed every page
 
 class QueryRequest(BaseModel):
     question: str
@@ -1,12 +1,17 @@
 """
 Chat management API routes
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 from database.chat_repository import chat_repository
+from services.startup import startup
 
-router = APIRouter()
+async def wait_for_firestore():
+    """Let Firestore finish connecting in the background instead of on the event loop"""
+    await startup.get("firestore")
+
+router = APIRouter(dependencies=[Depends(wait_for_firestore)])
 
 class CreateChatRequest(BaseModel):
     userId: str
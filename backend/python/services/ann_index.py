@@ -0,0 +1,225 @@
+"""
+Approximate nearest-neighbour backends for the in-memory vector indexes
+
+All backends work on L2-normalized float32 rows, so inner product is cosine
+similarity. Small corpora always use exact search.
+"""
+import threading
+import numpy as np
+from config import Config
+
+try:
+    import faiss
+except ImportError:  # faiss-cpu is optional at runtime
+    faiss = None
+
+
+def _top_k(scores: np.ndarray, k: int):
+    """Positions of the k best scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+class ExactIndex:
+    """Brute-force inner product over the whole matrix"""
+    name = "exact"
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+
+    def extended(self, matrix: np.ndarray):
+        """Return an index covering matrix, whose leading rows are unchanged"""
+        return build_ann_index(matrix)
+
+    def search(self, query: np.ndarray, k: int, mask=None):
+        """
+        Args:
+            query: np.ndarray - Normalized query vector
+            k: int - Number of neighbours
+            mask: Optional[np.ndarray] - Boolean row filter
+
+        Returns:
+            tuple: (row indices, scores), best first
+        """
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            if not len(rows):
+                return rows, np.empty(0, dtype=np.float32)
+            scores = self.matrix[rows] @ query
+            top = _top_k(scores, k)
+            return rows[top], scores[top]
+
+        scores = self.matrix @ query
+        top = _top_k(scores, k)
+        return top, scores[top]
+
+
+class IVFFlatIndex(ExactIndex):
+    """
+    Pure-NumPy IVF-flat: spherical k-means coarse quantizer, exact scoring
+    inside the nprobe closest inverted lists
+    """
+    name = "ivf"
+
+    def __init__(self, matrix: np.ndarray, centroids=None):
+        super().__init__(matrix)
+        self.trained_size = len(matrix)
+
+        if centroids is None:
+            centroids = self._train(matrix)
+        self.centroids = centroids
+        self.lists = self._build_lists(self._assign(matrix))
+
+    @staticmethod
+    def _nlist(n: int) -> int:
+        if Config.IVF_NLIST:
+            return max(1, min(Config.IVF_NLIST, n))
+        return max(1, min(int(4 * np.sqrt(n)), n))
+
+    def _train(self, matrix: np.ndarray) -> np.ndarray:
+        """Spherical k-means on a random sample of the rows"""
+        nlist = self._nlist(len(matrix))
+        rng = np.random.default_rng(0)
+
+        sample_size = min(len(matrix), nlist * Config.IVF_TRAIN_SAMPLES_PER_LIST)
+        sample = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(Config.IVF_TRAIN_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            counts = np.bincount(labels, minlength=nlist)
+
+            # Per-cluster sums via one sort + reduceat instead of a scatter-add
+            order = np.argsort(labels, kind="stable")
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.zeros_like(centroids)
+            present = counts > 0
+            sums[present] = np.add.reduceat(sample[order], starts[present], axis=0)
+
+            # Re-seed empty clusters so every list stays useful
+            empty = counts == 0
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        return centroids
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        if not len(vectors):
+            return np.empty(0, dtype=np.int64)
+        return np.argmax(vectors @ self.centroids.T, axis=1)
+
+    def _build_lists(self, assignments: np.ndarray):
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+
+    def extended(self, matrix: np.ndarray):
+        if len(matrix) > Config.ANN_RETRAIN_FACTOR * self.trained_size:
+            return build_ann_index(matrix)
+
+        # Only the new rows are assigned; lists they don't land in are shared
+        start = len(self.matrix)
+        index = IVFFlatIndex.__new__(IVFFlatIndex)
+        index.matrix = matrix
+        index.trained_size = self.trained_size
+        index.centroids = self.centroids
+        index.lists = list(self.lists)
+
+        assignments = self._assign(matrix[start:])
+        order = np.argsort(assignments, kind="stable")
+        touched, bounds = np.unique(assignments[order], return_index=True)
+        for list_id, rows in zip(touched, np.split(order + start, bounds[1:])):
+            index.lists[list_id] = np.concatenate([self.lists[list_id], rows])
+        return index
+
+    def search(self, query: np.ndarray, k: int, mask=None):
+        if mask is not None and mask.sum() <= Config.ANN_MIN_VECTORS:
+            return super().search(query, k, mask)
+
+        nprobe = min(Config.IVF_NPROBE, len(self.centroids))
+        probes = _top_k(self.centroids @ query, nprobe)
+        rows = np.concatenate([self.lists[p] for p in probes])
+
+        if mask is not None:
+            rows = rows[mask[rows]]
+
+        if len(rows) < k:
+            return super().search(query, k, mask)
+
+        scores = self.matrix[rows] @ query
+        top = _top_k(scores, k)
+        return rows[top], scores[top]
+
+
+class HNSWIndex(ExactIndex):
+    """Graph index backed by faiss IndexHNSWFlat (inner product metric)"""
+    name = "hnsw"
+
+    def __init__(self, matrix: np.ndarray):
+        super().__init__(matrix)
+        self._lock = threading.Lock()
+        self.trained_size = len(matrix)
+        self.index = faiss.IndexHNSWFlat(matrix.shape[1], Config.HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        self.index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+        self.index.hnsw.efSearch = Config.HNSW_EF_SEARCH
+        self.index.add(matrix)
+
+    def extended(self, matrix: np.ndarray):
+        # HNSW supports incremental inserts, so the graph is shared with
+        # older snapshots; their searches drop rows they do not know about
+        with self._lock:
+            self.index.add(np.ascontiguousarray(matrix[self.index.ntotal:]))
+        index = HNSWIndex.__new__(HNSWIndex)
+        index.matrix = matrix
+        index._lock = self._lock
+        index.trained_size = self.trained_size
+        index.index = self.index
+        return index
+
+    def search(self, query: np.ndarray, k: int, mask=None):
+        if mask is not None and mask.sum() <= Config.ANN_MIN_VECTORS:
+            return super().search(query, k, mask)
+
+        fetch = k if mask is None else k * Config.ANN_FILTER_OVERSAMPLE
+        with self._lock:
+            scores, rows = self.index.search(query.reshape(1, -1), fetch)
+        scores, rows = scores[0], rows[0]
+
+        keep = (rows >= 0) & (rows < len(self.matrix))
+        if mask is not None:
+            keep &= mask[np.clip(rows, 0, len(mask) - 1)]
+        rows, scores = rows[keep][:k], scores[keep][:k]
+
+        if len(rows) < k and mask is not None:
+            return super().search(query, k, mask)
+        return rows, scores
+
+
+def build_ann_index(matrix: np.ndarray):
+    """
+    Pick the search backend for a normalized float32 matrix
+
+    Config.ANN_BACKEND selects "exact", "ivf", "hnsw" or "auto"; corpora
+    smaller than Config.ANN_MIN_VECTORS always use exact search.
+    """
+    backend = Config.ANN_BACKEND
+    if backend == "exact" or len(matrix) < Config.ANN_MIN_VECTORS:
+        return ExactIndex(matrix)
+
+    if backend == "auto":
+        backend = "hnsw" if faiss is not None else "ivf"
+
+    if backend == "hnsw":
+        if faiss is None:
+            print("⚠️ faiss not installed, falling back to IVF index")
+        else:
+            return HNSWIndex(matrix)
+
+    return IVFFlatIndex(matrix)
@@ -0,0 +1,159 @@
+"""
+Text-tower-only CLIP encoders for the query path
+
+The full CLIPModel carries the vision tower too; these backends load only
+the text encoder and its projection, optionally int8-quantized or run on
+ONNX Runtime. Every encoder returns L2-normalized float32 rows matching
+CLIPModel.get_text_features.
+"""
+import os
+import tempfile
+import numpy as np
+import torch
+from transformers import CLIPTextModelWithProjection
+from config import Config
+
+TEXT_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+
+def _normalize(features: np.ndarray) -> np.ndarray:
+    return features / np.linalg.norm(features, axis=-1, keepdims=True)
+
+
+class TorchTextEncoder:
+    """fp32 text tower, optionally with Linear layers dynamically quantized to int8"""
+
+    def __init__(self, model_name: str, quantize: bool = False):
+        model = CLIPTextModelWithProjection.from_pretrained(model_name)
+        model.eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self.model = model
+        self.name = "torch-int8" if quantize else "torch"
+
+    def encode(self, input_ids, attention_mask) -> np.ndarray:
+        with torch.no_grad():
+            features = self.model(
+                input_ids=torch.as_tensor(input_ids),
+                attention_mask=torch.as_tensor(attention_mask)
+            ).text_embeds
+        return _normalize(features.numpy())
+
+
+class _ProjectedTextTower(torch.nn.Module):
+    """Export wrapper returning only the projected text embedding"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).text_embeds
+
+
+def _write_atomically(path: str, write):
+    """
+    Produce path via write(temp_path) and move it into place only once complete
+
+    The temp file sits in the same directory, so os.replace is atomic and a
+    crashed or concurrent export never leaves a truncated model at path.
+    """
+    fd, temp_path = tempfile.mkstemp(suffix=".onnx", dir=os.path.dirname(path) or ".")
+    os.close(fd)
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def export_onnx(model_name: str, path: str, quantize: bool = False) -> str:
+    """
+    Export the CLIP text tower to ONNX (and optionally int8-quantize it)
+
+    Args:
+        model_name: str - Hugging Face model name
+        path: str - Output .onnx path
+        quantize: bool - Also write a dynamically int8-quantized copy
+
+    Returns:
+        str: Path of the model to load
+    """
+    if not os.path.exists(path):
+        print(f"📦 Exporting CLIP text tower to {path}...")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        model = CLIPTextModelWithProjection.from_pretrained(model_name)
+        model.eval()
+        dummy_ids = torch.ones((1, 77), dtype=torch.long)
+        _write_atomically(path, lambda temp_path: torch.onnx.export(
+            _ProjectedTextTower(model),
+            (dummy_ids, torch.ones_like(dummy_ids)),
+            temp_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["text_embeds"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "text_embeds": {0: "batch"},
+            },
+            opset_version=14,
+        ))
+
+    if not quantize:
+        return path
+
+    quantized_path = path.replace(".onnx", ".int8.onnx")
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        print(f"📦 Quantizing ONNX text tower to {quantized_path}...")
+        _write_atomically(quantized_path, lambda temp_path: quantize_dynamic(
+            path, temp_path, weight_type=QuantType.QInt8
+        ))
+    return quantized_path
+
+
+class OnnxTextEncoder:
+    """Text tower on ONNX Runtime (CPU), exported on first use"""
+
+    def __init__(self, model_name: str, path: str, quantize: bool = False):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("CLIP_TEXT_BACKEND=onnx requires the onnxruntime package")
+
+        model_path = export_onnx(model_name, path, quantize)
+        options = onnxruntime.SessionOptions()
+        if Config.TORCH_NUM_THREADS > 0:
+            options.intra_op_num_threads = Config.TORCH_NUM_THREADS
+        self.session = onnxruntime.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"]
+        )
+        self.name = "onnx-int8" if quantize else "onnx"
+
+    def encode(self, input_ids, attention_mask) -> np.ndarray:
+        (features,) = self.session.run(None, {
+            "input_ids": np.asarray(input_ids, dtype=np.int64),
+            "attention_mask": np.asarray(attention_mask, dtype=np.int64),
+        })
+        return _normalize(features)
+
+
+def build_text_encoder(backend: str, model_name: str = None):
+    """
+    Create a text-only encoder
+
+    Args:
+        backend: str - One of TEXT_BACKENDS
+        model_name: str - Hugging Face model name (default Config.CLIP_MODEL_NAME)
+    """
+    model_name = model_name or Config.CLIP_MODEL_NAME
+    if backend == "torch":
+        return TorchTextEncoder(model_name)
+    if backend == "torch-int8":
+        return TorchTextEncoder(model_name, quantize=True)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxTextEncoder(model_name, Config.CLIP_ONNX_PATH, quantize=backend == "onnx-int8")
+    raise ValueError(f"Unknown CLIP text backend: {backend}")
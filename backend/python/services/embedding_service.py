@@ -1,11 +1,17 @@
 """
 CLIP embedding service for text and images
 """
+import asyncio
+import threading
 import torch
 import numpy as np
-from transformers import CLIPProcessor, CLIPModel
+from transformers import CLIPProcessor, CLIPModel, CLIPConfig, CLIPVisionModelWithProjection
 from PIL import Image
 from config import Config
+from services.inference_executor import inference_executor, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from services.micro_batcher import MicroBatcher
+from services.clip_text_encoder import build_text_encoder
+from utils.lru_cache import TTLCache
 
 class EmbeddingService:
     _instance = None
@@ -17,12 +23,98 @@ class EmbeddingService:
         return cls._instance
     
     def _initialize(self):
-        """Load CLIP model and processor"""
-        print("📄 Loading CLIP model...")
-        self.model = CLIPModel.from_pretrained(Config.CLIP_MODEL_NAME)
-        self.processor = CLIPProcessor.from_pretrained(Config.CLIP_MODEL_NAME)
-        self.model.eval()
-        print("✅ CLIP model loaded")
+        """Set up batching and caching; the model itself is loaded on first use"""
+        self._loaded = False
+        self._model = None  # full CLIPModel, when CLIP_TEXT_BACKEND is "full"
+        self._text_encoder = None  # text-only backend otherwise
+        self._vision_model = None
+        self._processor = None
+        self.embedding_dim = None
+        self._load_lock = threading.Lock()
+        
+        # Concurrent query embeddings share padded forward passes
+        self.text_batcher = MicroBatcher(
+            self._embed_text_batch,
+            max_batch_size=Config.QUERY_BATCH_MAX_SIZE,
+            max_wait_ms=Config.QUERY_BATCH_MAX_WAIT_MS,
+            priority=PRIORITY_INTERACTIVE,
+            max_in_flight=Config.INFERENCE_WORKERS
+        )
+        self.query_cache = TTLCache(
+            Config.QUERY_EMBEDDING_CACHE_SIZE,
+            Config.QUERY_EMBEDDING_CACHE_TTL
+        )
+    
+    def load(self):
+        """Load CLIP model and processor (once; safe to call from any thread)"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            backend = Config.CLIP_TEXT_BACKEND
+            print(f"📄 Loading CLIP model ({backend} text backend)...")
+            if Config.TORCH_NUM_THREADS > 0:
+                torch.set_num_threads(Config.TORCH_NUM_THREADS)
+            self._processor = CLIPProcessor.from_pretrained(Config.CLIP_MODEL_NAME)
+            self.embedding_dim = CLIPConfig.from_pretrained(Config.CLIP_MODEL_NAME).projection_dim
+            
+            if backend == "full":
+                model = CLIPModel.from_pretrained(Config.CLIP_MODEL_NAME)
+                model.eval()
+                self._model = model
+            else:
+                # Text tower only; the vision tower is loaded separately, if at all
+                self._text_encoder = build_text_encoder(backend)
+                if Config.CLIP_LOAD_VISION:
+                    vision_model = CLIPVisionModelWithProjection.from_pretrained(Config.CLIP_MODEL_NAME)
+                    vision_model.eval()
+                    self._vision_model = vision_model
+            
+            self._loaded = True
+            print("✅ CLIP model loaded")
+    
+    @property
+    def processor(self):
+        self.load()
+        return self._processor
+    
+    def _text_features(self, texts):
+        """Normalized text embeddings for one padded batch"""
+        self.load()
+        inputs = self.processor(
+            text=list(texts),
+            return_tensors="pt",
+            padding=True,
+            truncation=True,
+            max_length=77
+        )
+        
+        if self._text_encoder is not None:
+            return self._text_encoder.encode(inputs["input_ids"], inputs["attention_mask"])
+        
+        with torch.no_grad():
+            features = self._model.get_text_features(**inputs)
+            features = features / features.norm(dim=-1, keepdim=True)
+            return features.numpy()
+    
+    def _require_vision(self):
+        self.load()
+        if self._model is None and self._vision_model is None:
+            raise RuntimeError("Image embedding is disabled on this worker (CLIP_LOAD_VISION=false)")
+    
+    def _image_features(self, images):
+        """Normalized image embeddings for one batch"""
+        self._require_vision()
+        inputs = self.processor(images=list(images), return_tensors="pt")
+        
+        with torch.no_grad():
+            if self._model is not None:
+                features = self._model.get_image_features(**inputs)
+            else:
+                features = self._vision_model(**inputs).image_embeds
+            features = features / features.norm(dim=-1, keepdim=True)
+            return features.numpy()
     
     def embed_image(self, image_data):
         """
@@ -39,12 +131,7 @@ class EmbeddingService:
         else:
             image = image_data
         
-        inputs = self.processor(images=image, return_tensors="pt")
-        
-        with torch.no_grad():
-            features = self.model.get_image_features(**inputs)
-            features = features / features.norm(dim=-1, keepdim=True)
-            return features.squeeze().numpy()
+        return self._image_features([image])[0]
     
     def embed_text(self, text):
         """
@@ -56,18 +143,174 @@ class EmbeddingService:
         Returns:
             numpy.ndarray: Text embedding
         """
-        inputs = self.processor(
-            text=text,
-            return_tensors="pt",
-            padding=True,
-            truncation=True,
-            max_length=77
+        return self._text_features([text])[0]
+    
+    def _text_batches(self, texts, batch_size):
+        """Split text indices into batches bucketed by token length"""
+        lengths = [
+            len(ids) for ids in self.processor.tokenizer(
+                list(texts), truncation=True, max_length=77
+            )["input_ids"]
+        ]
+        order = np.argsort(lengths, kind="stable")
+        return [order[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    
+    def _embed_text_batch(self, texts):
+        """One padded forward pass of the text tower"""
+        return self._text_features(texts)
+    
+    def _embed_image_batch(self, images):
+        """
+        One forward pass of the vision tower
+        
+        If the batch fails (e.g. a degenerate image the processor rejects),
+        it is retried image by image so one bad image does not cost the
+        rest of the batch.
+        
+        Returns:
+            tuple: (embeddings of the images that succeeded, failed indices)
+        """
+        try:
+            return self._image_features(images), []
+        except Exception as e:
+            if len(images) == 1:
+                print(f"      ⚠️ Skipping image that failed to embed: {e}")
+                return self._empty(), [0]
+            print(f"      ⚠️ Image batch failed ({e}), retrying images one by one")
+        
+        rows, failed = [], []
+        for i, image in enumerate(images):
+            try:
+                rows.append(self._image_features([image])[0])
+            except Exception as e:
+                print(f"      ⚠️ Skipping image that failed to embed: {e}")
+                failed.append(i)
+        return (np.vstack(rows) if rows else self._empty()), failed
+    
+    def _merge_image_batches(self, results, batch_size):
+        """Stack per-batch results, turning failed indices into input positions"""
+        failed = [
+            batch * batch_size + i
+            for batch, (_, batch_failed) in enumerate(results)
+            for i in batch_failed
+        ]
+        return np.vstack([features for features, _ in results]), failed
+    
+    def _empty(self):
+        self.load()
+        return np.empty((0, self.embedding_dim), dtype=np.float32)
+    
+    def embed_texts(self, texts, batch_size=None):
+        """
+        Embed many texts using CLIP in batches
+        
+        Texts are bucketed by token length before batching so each batch is
+        padded only to the longest text in its own bucket.
+        
+        Args:
+            texts: List[str] - Texts to embed
+            batch_size: int - Texts per forward pass (default: Config.EMBEDDING_BATCH_SIZE)
+            
+        Returns:
+            numpy.ndarray: Text embeddings, one row per input text
+        """
+        if not texts:
+            return self._empty()
+        
+        # Batching loads the model, which sets embedding_dim
+        batches = self._text_batches(texts, batch_size or Config.EMBEDDING_BATCH_SIZE)
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        for batch_idx in batches:
+            embeddings[batch_idx] = self._embed_text_batch([texts[i] for i in batch_idx])
+        
+        return embeddings
+    
+    def embed_images(self, images, batch_size=None):
+        """
+        Embed many images using CLIP in batches
+        
+        Images that fail to embed are skipped, as single-image ingestion
+        always did, instead of failing the whole document.
+        
+        Args:
+            images: List[PIL.Image] - Images to embed
+            batch_size: int - Images per forward pass (default: Config.EMBEDDING_BATCH_SIZE)
+            
+        Returns:
+            tuple: (embeddings, failed) - one row per image that embedded, in
+            order, and the indices of the images that were skipped
+        """
+        if not images:
+            return self._empty(), []
+        
+        self._require_vision()
+        batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+        return self._merge_image_batches([
+            self._embed_image_batch(images[start:start + batch_size])
+            for start in range(0, len(images), batch_size)
+        ], batch_size)
+    
+    async def aembed_text(self, text, priority=PRIORITY_INTERACTIVE):
+        """
+        Embed text on the inference executor (interactive priority by default)
+        
+        Interactive requests go through the micro-batcher when
+        Config.QUERY_BATCH_MAX_SIZE > 1.
+        """
+        if priority == PRIORITY_INTERACTIVE and Config.QUERY_BATCH_MAX_SIZE > 1:
+            return await self.text_batcher.submit(text)
+        return await inference_executor.run(priority, self.embed_text, text)
+    
+    async def aembed_query(self, text, cache_key):
+        """
+        Embed a user question, reusing the embedding of earlier questions
+        with the same cache key (the normalized question fingerprint)
+        """
+        embedding = self.query_cache.get(cache_key)
+        if embedding is None:
+            embedding = await self.aembed_text(text)
+            self.query_cache.set(cache_key, embedding)
+        return embedding
+    
+    async def aembed_image(self, image_data, priority=PRIORITY_INTERACTIVE):
+        """Embed an image on the inference executor (interactive priority by default)"""
+        return await inference_executor.run(priority, self.embed_image, image_data)
+    
+    async def aembed_texts(self, texts, batch_size=None, priority=PRIORITY_BULK):
+        """
+        Embed many texts on the inference executor
+        
+        Every batch is a separate work item, so higher-priority requests can
+        run between the batches of a large ingestion job.
+        """
+        if not texts:
+            return self._empty()
+        
+        batches = await inference_executor.run(
+            priority, self._text_batches, texts, batch_size or Config.EMBEDDING_BATCH_SIZE
         )
+        results = await asyncio.gather(*[
+            inference_executor.run(priority, self._embed_text_batch, [texts[i] for i in batch_idx])
+            for batch_idx in batches
+        ])
         
-        with torch.no_grad():
-            features = self.model.get_text_features(**inputs)
-            features = features / features.norm(dim=-1, keepdim=True)
-            return features.squeeze().numpy()
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        for batch_idx, features in zip(batches, results):
+            embeddings[batch_idx] = features
+        return embeddings
+    
+    async def aembed_images(self, images, batch_size=None, priority=PRIORITY_BULK):
+        """Embed many images on the inference executor, one work item per batch (see embed_images)"""
+        if not images:
+            return self._empty(), []
+        
+        await inference_executor.run(priority, self._require_vision)
+        batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+        results = await asyncio.gather(*[
+            inference_executor.run(priority, self._embed_image_batch, images[start:start + batch_size])
+            for start in range(0, len(images), batch_size)
+        ])
+        return self._merge_image_batches(results, batch_size)
     
     @staticmethod
     def cosine_similarity(a, b):
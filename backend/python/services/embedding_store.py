@@ -0,0 +1,205 @@
+"""
+Persistent, content-addressed cache of chunk and image embeddings
+
+College PDFs repeat logos, letterheads, signatures and footers on every
+page and across documents; each distinct one only needs embedding once.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from config import Config
+
+
+def text_key(text: str) -> str:
+    """
+    Cache key for a text chunk
+
+    Text is lowercased and its whitespace collapsed, as the CLIP tokenizer
+    does, so variants that embed identically share a key.
+    """
+    normalized = " ".join(text.lower().split())
+    salt = f"text|{Config.CLIP_MODEL_NAME}|{Config.CLIP_TEXT_BACKEND}|"
+    return hashlib.sha256((salt + normalized).encode("utf-8")).hexdigest()
+
+
+def image_key(image) -> str:
+    """Cache key for a PIL image: its size, mode and decoded pixels"""
+    digest = hashlib.sha256(f"image|{Config.CLIP_MODEL_NAME}|{image.mode}|{image.size}|".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class EmbeddingStore:
+    """
+    SQLite table of key -> float32 vector, bounded by total vector bytes
+
+    Shared by every document and kept across restarts. When the table
+    grows past max_bytes, the least recently used entries are evicted
+    until it is back under 90% of the budget. An entry's last_used time is
+    only rewritten once it is Config.EMBEDDING_STORE_TOUCH_INTERVAL old, so
+    cache hits rarely write. SQLite errors never fail ingestion: lookups
+    count as misses and writes are skipped.
+
+    Args:
+        path: str - SQLite file (empty = cache disabled)
+        max_bytes: int - Total size budget for stored vectors
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=Config.EMBEDDING_STORE_BUSY_TIMEOUT,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used)")
+            self._total_bytes = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, keys):
+        """
+        Look up vectors by key (blocking; call from a worker thread)
+
+        Args:
+            keys: List[str] - Cache keys
+
+        Returns:
+            Dict[str, np.ndarray]: Vectors found, by key
+        """
+        unique = list(dict.fromkeys(keys))
+        if not self.enabled or not unique:
+            return {}
+
+        found = {}
+        with self._lock:
+            try:
+                conn = self._connect()
+                stale = []
+                touch_before = time.time() - Config.EMBEDDING_STORE_TOUCH_INTERVAL
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(unique), 500):
+                    batch = unique[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vector, last_used FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                        batch
+                    ).fetchall()
+                    for key, vector, last_used in rows:
+                        found[key] = np.frombuffer(vector, dtype=np.float32)
+                        if last_used < touch_before:
+                            stale.append(key)
+
+                if stale:
+                    now = time.time()
+                    conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                     [(now, key) for key in stale])
+                    conn.commit()
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️ Embedding store lookup failed: {e}")
+                self._rollback()
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, items):
+        """
+        Store vectors (blocking; call from a worker thread)
+
+        Args:
+            items: Iterable[Tuple[str, np.ndarray]] - (key, vector) pairs
+        """
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items]
+        if not self.enabled or not rows:
+            return
+
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    [(key, vector, now) for key, vector in rows]
+                )
+                # Replaced keys are over-counted here; _evict recounts before deleting anything
+                self._total_bytes += sum(len(vector) for _, vector in rows)
+                if self._total_bytes > self.max_bytes:
+                    self._evict(conn)
+                conn.commit()
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️ Embedding store write skipped: {e}")
+                self._rollback()
+
+    def _rollback(self):
+        """Discard a failed transaction so the connection stays usable"""
+        if self._conn is not None:
+            try:
+                self._conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, conn):
+        """Drop least recently used entries down to 90% of the budget"""
+        self._total_bytes = conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        while self._total_bytes > target:
+            rows = conn.execute(
+                "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used LIMIT 1000"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for key, size in rows:
+                if self._total_bytes <= target:
+                    break
+                conn.execute("DELETE FROM embeddings WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "bytes": self._total_bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+# Singleton instance
+embedding_store = EmbeddingStore(Config.EMBEDDING_STORE_PATH, Config.EMBEDDING_STORE_MAX_BYTES)
@@ -0,0 +1,104 @@
+"""
+Shared, pooled HTTP client for outbound requests
+"""
+import aiohttp
+from config import Config
+
+
+class DownloadTooLargeError(ValueError):
+    """Raised when a response body exceeds the allowed download size"""
+
+
+class HTTPClient:
+    """
+    One aiohttp session per worker, opened at startup and closed at shutdown
+
+    Connections are pooled and kept alive between requests, with a cap on
+    connections per host, and DNS lookups are cached.
+    """
+
+    def __init__(self):
+        self._session = None
+
+    async def start(self):
+        """Open the pooled session"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=Config.HTTP_MAX_CONNECTIONS,
+                limit_per_host=Config.HTTP_MAX_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=Config.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                # No total timeout: a large PDF may legitimately take minutes,
+                # but a stalled connection fails after HTTP_READ_TIMEOUT
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    sock_connect=Config.HTTP_CONNECT_TIMEOUT,
+                    sock_read=Config.HTTP_READ_TIMEOUT
+                ),
+            )
+            print("🌐 HTTP client started")
+
+    async def close(self):
+        """Close the session and its pooled connections"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, opening it if startup hasn't run (e.g. in scripts)"""
+        await self.start()
+        return self._session
+
+    async def download(self, url: str, max_bytes: int = None) -> bytearray:
+        """
+        Stream a response body into memory, refusing anything over max_bytes
+
+        When the server sends Content-Length the buffer is allocated once at
+        that size and filled in place, so the body is held in memory once.
+
+        Args:
+            url: str - URL to GET
+            max_bytes: int - Size limit (default Config.HTTP_MAX_DOWNLOAD_BYTES)
+
+        Returns:
+            bytearray: Response body
+
+        Raises:
+            RuntimeError: If the server responds with a non-200 status
+            DownloadTooLargeError: If the body is larger than max_bytes
+        """
+        max_bytes = max_bytes or Config.HTTP_MAX_DOWNLOAD_BYTES
+        session = await self.get_session()
+
+        async with session.get(url) as response:
+            if response.status != 200:
+                raise RuntimeError(f"Download failed with status {response.status}")
+
+            # Reject early when the server announces the size
+            if response.content_length is not None and response.content_length > max_bytes:
+                raise DownloadTooLargeError(
+                    f"Download is {response.content_length} bytes (limit {max_bytes})"
+                )
+
+            expected = response.content_length
+            body = bytearray(expected or 0)
+            received = 0
+            async for chunk in response.content.iter_chunked(Config.HTTP_CHUNK_SIZE):
+                end = received + len(chunk)
+                if end > max_bytes:
+                    raise DownloadTooLargeError(f"Download exceeded {max_bytes} bytes")
+                if expected is not None and end <= expected:
+                    body[received:end] = chunk
+                else:
+                    body[received:] = chunk
+                received = end
+
+        if received < len(body):
+            del body[received:]  # server sent less than it announced
+        return body
+
+# Singleton instance
+http_client = HTTPClient()
@@ -0,0 +1,78 @@
+"""
+Dedicated, priority-ordered executor for model inference
+"""
+import asyncio
+import itertools
+import queue
+import threading
+from concurrent.futures import Future
+from config import Config
+
+# Lower value runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+
+class InferenceExecutor:
+    """
+    Runs model forward passes on a small pool of dedicated threads
+
+    Work items are taken from a priority queue, so interactive query
+    embeddings overtake queued bulk ingestion batches. Items are never
+    preempted once running, which is why bulk callers submit one batch per item.
+    """
+
+    def __init__(self, workers: int = None):
+        self._workers = workers or Config.INFERENCE_WORKERS
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self._workers):
+                thread = threading.Thread(target=self._worker, name=f"inference-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            _, _, item = self._queue.get()
+            if item is None:
+                return
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, priority: int, fn, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) at the given priority"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((priority, next(self._sequence), (future, fn, args, kwargs)))
+        return future
+
+    async def run(self, priority: int, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) run on an inference thread"""
+        return await asyncio.wrap_future(self.submit(priority, fn, *args, **kwargs))
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def shutdown(self):
+        """Stop the worker threads after the queued work drains"""
+        for _ in self._threads:
+            self._queue.put((float("inf"), next(self._sequence), None))
+        self._threads = []
+
+# Singleton instance
+inference_executor = InferenceExecutor()
@@ -4,11 +4,14 @@ LLM service for Gemini Vision integration
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from config import Config
-import aiohttp
-import tempfile
-import os
-import fitz
-import base64
+from collections import Counter, defaultdict, deque
+import asyncio
+import threading
+import time
+import numpy as np
+from database.document_repository import document_repository
+from services.pdf_cache import image_cache
+from services.thumbnail_store import thumbnail_store
 
 class LLMService:
     _instance = None
@@ -20,63 +23,140 @@ class LLMService:
         return cls._instance
     
     def _initialize(self):
-        """Initialize Gemini model"""
-        print("🔄 Initializing Gemini...")
-        self.llm = ChatGoogleGenerativeAI(
-            model=Config.GEMINI_MODEL_NAME,
-            temperature=Config.GEMINI_TEMPERATURE
-        )
-        print("✅ Gemini initialized")
+        """Set up metrics; the Gemini client is created on first use"""
+        self._llm = None
+        self._load_lock = threading.Lock()
+        
+        # Image loading metrics (recent seconds per stage)
+        self._stage_timings = defaultdict(lambda: deque(maxlen=1024))
+        self._images_dropped = 0
+        self._image_sources = Counter()
+        self._payload_bytes = deque(maxlen=1024)  # base64 image bytes per message
+    
+    def load(self):
+        """Initialize Gemini model (once; safe to call from any thread)"""
+        if self._llm is not None:
+            return
+        with self._load_lock:
+            if self._llm is not None:
+                return
+            print("🔄 Initializing Gemini...")
+            self._llm = ChatGoogleGenerativeAI(
+                model=Config.GEMINI_MODEL_NAME,
+                temperature=Config.GEMINI_TEMPERATURE
+            )
+            print("✅ Gemini initialized")
     
-    async def _re_extract_image(self, file_url: str, page_num: int, img_index: int):
+    @property
+    def llm(self):
+        self.load()
+        return self._llm
+    
+    async def _re_extract_image(self, doc_id: str, file_url: str, page_num: int, img_index: int,
+                                timings: dict = None):
         """
         Re-extract a specific image from PDF
         
         Args:
+            doc_id: Source document ID
             file_url: URL to the PDF file
             page_num: Page number (0-indexed)
             img_index: Image index on that page
+            timings: Filled with fetch/extract seconds when the image isn't cached
             
         Returns:
             str: Base64 encoded image
         """
         try:
-            # Download PDF
-            async with aiohttp.ClientSession() as session:
-                async with session.get(file_url) as response:
-                    if response.status != 200:
-                        print(f"⚠️ Failed to download PDF: {response.status}")
-                        return None
-                    pdf_bytes = await response.read()
-            
-            # Extract image
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-                tmp_file.write(pdf_bytes)
-                tmp_path = tmp_file.name
-            
-            try:
-                doc = fitz.open(tmp_path)
-                page = doc[page_num]
-                images = page.get_images(full=True)
-                
-                if img_index < len(images):
-                    xref = images[img_index][0]
-                    base_image = doc.extract_image(xref)
-                    image_bytes = base_image["image"]
-                    img_base64 = base64.b64encode(image_bytes).decode()
-                    doc.close()
-                    return img_base64
-                else:
-                    doc.close()
-                    return None
-                    
-            finally:
-                os.unlink(tmp_path)
-                
+            # The PDF is downloaded once and shared by every image and query
+            return await image_cache.get(doc_id, file_url, page_num, img_index, timings)
         except Exception as e:
             print(f"❌ Error re-extracting image: {e}")
             return None
     
+    async def _load_image(self, doc, timings: dict):
+        """
+        Load an image chunk from the thumbnail store, or re-extract it from its PDF
+        
+        Returns:
+            tuple: (base64 data, content type), or None
+        """
+        doc_id = doc.metadata.get('documentId')
+        page_num = doc.metadata.get('page')
+        image_id = doc.metadata.get('image_id', '')
+        
+        start_time = time.perf_counter()
+        thumbnail = await thumbnail_store.get_base64(image_id)
+        if thumbnail_store.enabled:
+            timings["thumbnail"] = time.perf_counter() - start_time
+        if thumbnail:
+            self._image_sources["thumbnail"] += 1
+            return thumbnail
+        
+        # Shared with prepare_sources through the document metadata cache
+        start_time = time.perf_counter()
+        file_url = (await document_repository.get(doc_id)).get('fileUrl')
+        timings["lookup"] = time.perf_counter() - start_time
+        if not file_url:
+            return None
+        
+        # Parse image index from image_id (format: docId_DIGEST_img_INDEX)
+        img_index = int(image_id.split('_img_')[-1]) if '_img_' in image_id else 0
+        
+        print(f"🔄 Re-extracting image from page {page_num + 1}...")
+        img_base64 = await self._re_extract_image(doc_id, file_url, page_num, img_index, timings)
+        if not img_base64:
+            return None
+        self._image_sources["pdf"] += 1
+        return img_base64, "image/png"
+    
+    async def _load_images(self, image_docs):
+        """
+        Load images concurrently, dropping any that miss the deadline
+        
+        Args:
+            image_docs: List[Document] - Image chunks, best first
+            
+        Returns:
+            List[Tuple[Document, Optional[tuple]]]: Each chunk with its
+                (base64 data, content type), or None if it failed or timed out,
+                in the original order
+        """
+        semaphore = asyncio.Semaphore(Config.IMAGE_EXTRACT_CONCURRENCY)
+        
+        async def load(doc):
+            timings = {}
+            start_time = time.perf_counter()
+            
+            async def bounded():
+                async with semaphore:
+                    return await self._load_image(doc, timings)
+            
+            try:
+                image = await asyncio.wait_for(bounded(), Config.IMAGE_EXTRACT_TIMEOUT)
+            except asyncio.TimeoutError:
+                print(f"⚠️ Dropped image from page {doc.metadata.get('page', 0) + 1}: "
+                      f"not ready within {Config.IMAGE_EXTRACT_TIMEOUT}s")
+                self._images_dropped += 1
+                image = None
+            except Exception as e:
+                print(f"❌ Error processing image: {e}")
+                image = None
+            
+            timings["image"] = time.perf_counter() - start_time
+            for stage, seconds in timings.items():
+                self._stage_timings[stage].append(seconds)
+            return doc, image
+        
+        start_time = time.perf_counter()
+        results = await asyncio.gather(*[load(doc) for doc in image_docs])
+        elapsed = time.perf_counter() - start_time
+        self._stage_timings["total"].append(elapsed)
+        
+        print(f"🖼️ Loaded {sum(1 for _, img in results if img)}/{len(results)} images "
+              f"in {elapsed * 1000:.0f}ms")
+        return results
+    
     async def create_multimodal_message(self, query, retrieved_docs):
         """
         Create multimodal message with text and re-extracted images
@@ -88,8 +168,6 @@ class LLMService:
         Returns:
             HumanMessage: Multimodal message for Gemini
         """
-        from database.firebase_client import firebase_client
-        
         content = []
         
         # Add the query
@@ -114,44 +192,29 @@ class LLMService:
             })
         
         # Re-extract and add images
-        db = firebase_client.db
-        for doc in image_docs[:3]:  # Limit to top 3 images to avoid token limits
-            try:
-                # Get document file URL from Firestore
-                doc_id = doc.metadata.get('documentId')
-                doc_ref = db.collection('documents').document(doc_id).get()
-                
-                if doc_ref.exists:
-                    file_url = doc_ref.to_dict().get('fileUrl')
-                    page_num = doc.metadata.get('page')
-                    
-                    # Parse image index from image_id (format: docId_page_N_img_INDEX)
-                    image_id = doc.metadata.get('image_id', '')
-                    img_index = int(image_id.split('_img_')[-1]) if '_img_' in image_id else 0
-                    
-                    print(f"🔄 Re-extracting image from page {page_num + 1}...")
-                    
-                    # Re-extract the image
-                    img_base64 = await self._re_extract_image(file_url, page_num, img_index)
-                    
-                    if img_base64:
-                        content.append({
-                            "type": "text",
-                            "text": f"\n[Image from page {page_num + 1}]:\n"
-                        })
-                        content.append({
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{img_base64}"
-                            }
-                        })
-                        print(f"✅ Added image from page {page_num + 1}")
-                    else:
-                        print(f"⚠️ Could not extract image from page {page_num + 1}")
-                        
-            except Exception as e:
-                print(f"❌ Error processing image: {e}")
-                continue
+        # Limit to top 3 images to avoid token limits
+        image_bytes = 0
+        for doc, image in await self._load_images(image_docs[:3]):
+            page_num = doc.metadata.get('page')
+            if image:
+                img_base64, content_type = image
+                image_bytes += len(img_base64)
+                content.append({
+                    "type": "text",
+                    "text": f"\n[Image from page {page_num + 1}]:\n"
+                })
+                content.append({
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:{content_type};base64,{img_base64}"
+                    }
+                })
+                print(f"✅ Added image from page {page_num + 1}")
+            else:
+                print(f"⚠️ Could not extract image from page {page_num + 1}")
+        
+        if image_docs:
+            self._payload_bytes.append(image_bytes)
         
         # Add instruction
         content.append({
@@ -161,7 +224,28 @@ class LLMService:
         
         return HumanMessage(content=content)
     
-    def generate_answer(self, message):
+    def image_stats(self) -> dict:
+        """Image loading latency per stage, image sources and base64 payload size"""
+        stages = {}
+        for stage, samples in self._stage_timings.items():
+            ms = np.array(samples) * 1000
+            stages[stage] = {
+                "p50": round(float(np.percentile(ms, 50)), 1),
+                "p99": round(float(np.percentile(ms, 99)), 1),
+            }
+        payload = np.array(self._payload_bytes)
+        return {
+            "stageMs": stages,
+            "dropped": self._images_dropped,
+            "sources": dict(self._image_sources),
+            "payloadBytes": {
+                "p50": int(np.percentile(payload, 50)) if len(payload) else None,
+                "max": int(payload.max()) if len(payload) else None,
+            },
+            "thumbnailStore": thumbnail_store.stats(),
+        }
+    
+    async def generate_answer(self, message):
         """
         Generate answer using Gemini
         
@@ -172,8 +256,32 @@ class LLMService:
             str: Generated answer
         """
         print("🤖 Generating answer with Gemini Vision...")
-        response = self.llm.invoke([message])
+        response = await self.llm.ainvoke([message])
         return response.content
+    
+    async def stream_answer(self, message):
+        """
+        Generate answer using Gemini, yielding text as it arrives
+        
+        Args:
+            message: HumanMessage - Multimodal message
+            
+        Yields:
+            str: Next piece of the answer
+        """
+        print("🤖 Streaming answer with Gemini Vision...")
+        start_time = time.perf_counter()
+        first_token_at = None
+        
+        async for chunk in self.llm.astream([message]):
+            if not chunk.content:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                print(f"⚡ First token after {(first_token_at - start_time) * 1000:.0f}ms")
+            yield chunk.content
+        
+        print(f"✅ Answer streamed in {time.perf_counter() - start_time:.1f}s")
 
 # Singleton instance
 llm_service = LLMService()
\ No newline at end of file
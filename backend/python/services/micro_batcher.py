@@ -0,0 +1,106 @@
+"""
+Dynamic micro-batching of concurrent inference requests
+"""
+import asyncio
+import time
+from collections import Counter, deque
+import numpy as np
+from services.inference_executor import inference_executor
+
+
+class MicroBatcher:
+    """
+    Collects requests arriving within max_wait_ms (up to max_batch_size) and
+    runs them as one call to batch_fn on the inference executor
+
+    batch_fn takes a list of items and returns a sequence with one result per
+    item, in order. Only max_in_flight batches run at once; while they do,
+    new requests keep queueing, so batches grow under load.
+    """
+
+    def __init__(self, batch_fn, max_batch_size: int, max_wait_ms: float,
+                 priority: int, max_in_flight: int = 1):
+        self._batch_fn = batch_fn
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._priority = priority
+        self._max_in_flight = max_in_flight
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self._in_flight = set()  # strong references so running batches aren't garbage-collected
+
+        # Metrics
+        self._queue_delays = deque(maxlen=2048)
+        self._batch_sizes = Counter()
+        self._requests = 0
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self._max_in_flight)
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, item):
+        """Queue one item and wait for its result"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        self._requests += 1
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+
+            deadline = time.perf_counter() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                # Take everything already waiting before honouring the window
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            dispatched_at = time.perf_counter()
+            for _, _, enqueued_at in batch:
+                self._queue_delays.append(dispatched_at - enqueued_at)
+            self._batch_sizes[len(batch)] += 1
+
+            task = asyncio.create_task(self._execute(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _execute(self, batch):
+        try:
+            results = await inference_executor.run(
+                self._priority, self._batch_fn, [item for item, _, _ in batch]
+            )
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        """Queueing delay percentiles and batch-size histogram"""
+        delays = np.array(self._queue_delays) * 1000
+        return {
+            "requests": self._requests,
+            "batches": sum(self._batch_sizes.values()),
+            "queueDelayMs": {
+                "p50": round(float(np.percentile(delays, 50)), 2) if len(delays) else None,
+                "p99": round(float(np.percentile(delays, 99)), 2) if len(delays) else None,
+            },
+            "batchSizeHistogram": dict(sorted(self._batch_sizes.items())),
+        }
@@ -0,0 +1,172 @@
+"""
+Per-page content manifest for incremental re-ingestion
+
+A document's manifest records, for each page, the content hash it was last
+ingested with and the IDs of the chunks that produced. Pages are matched to
+the previous ingestion by hash, not position, so inserting or removing a
+page only re-embeds pages whose content changed; pages that merely moved
+keep their chunks and have their page number rewritten. Chunk IDs are
+derived from the page hash and the chunk's own content, never from the
+page number, so a moved page keeps its IDs.
+"""
+import hashlib
+from collections import defaultdict
+from config import Config
+
+
+def manifest_salt() -> str:
+    """Settings that change a page's chunks or vectors; changing any re-ingests every page"""
+    if Config.CHUNK_UNIT == "tokens":
+        sizing = f"tokens:{Config.CHUNK_TOKENS}:{Config.CHUNK_TOKEN_OVERLAP}"
+    else:
+        sizing = f"chars:{Config.CHUNK_SIZE}:{Config.CHUNK_OVERLAP}"
+    return "|".join([Config.CLIP_MODEL_NAME, Config.CLIP_TEXT_BACKEND, sizing, Config.CHUNK_MULTI_VECTOR])
+
+
+def image_chunk_content(page_num: int) -> str:
+    """Stored content of an image chunk (page_num is 0-indexed)"""
+    return f"[Image on page {page_num + 1}]"
+
+
+def chunk_id(doc_id: str, page_hash: str, copy: int, content_hash: str, duplicate: int) -> str:
+    """
+    Deterministic Firestore ID of a chunk
+
+    Args:
+        doc_id: str - Document identifier
+        page_hash: str - Hash of the page the chunk came from
+        copy: int - Which page with this hash it is (identical pages get distinct IDs)
+        content_hash: str - Hash of the chunk's text, or of its image xref
+        duplicate: int - Which identical chunk on the page it is
+    """
+    key = f"{doc_id}:{page_hash}:{copy}:{content_hash}:{duplicate}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def _content_hash(doc) -> str:
+    if doc.metadata.get("type") == "image":
+        key = f"image:{doc.metadata.get('xref')}"
+    else:
+        key = f"text:{doc.page_content}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _chunk_ids(entry) -> list:
+    return list(entry.get("textIds", [])) + list(entry.get("imageIds", []))
+
+
+class IngestPlan:
+    """
+    Diff of a document's new page hashes against its stored manifest
+
+    Tracks which pages need re-embedding and which only moved, assigns
+    chunk IDs as chunks are stored, and produces the manifest to save once
+    ingestion succeeds.
+    """
+
+    def __init__(self, doc_id: str, hashes, previous=None, force: bool = False):
+        """
+        Args:
+            doc_id: str - Document identifier
+            hashes: List[str] - Hash of every page of the new file
+            previous: Optional[List[dict]] - Stored manifest pages (None if never ingested)
+            force: bool - Treat every page as changed
+        """
+        self.doc_id = doc_id
+        self.hashes = list(hashes)
+        self.has_manifest = previous is not None
+        previous = previous or []
+
+        # The k-th page with a given hash is matched to the k-th stored page with it
+        self.copies = self._copies(self.hashes)
+        stored = {
+            (entry.get("hash"), copy): (old_page, entry)
+            for old_page, (entry, copy) in enumerate(
+                zip(previous, self._copies([entry.get("hash") for entry in previous]))
+            )
+        }
+
+        self.pages = {}
+        self.changed_pages = []
+        self.moved_pages = {}  # new page -> old page
+        for page, key in enumerate(zip(self.hashes, self.copies)):
+            match = None if force else stored.pop(key, None)
+            if match is None:
+                self.pages[page] = {"hash": key[0], "textIds": [], "imageIds": []}
+                self.changed_pages.append(page)
+                continue
+
+            old_page, entry = match
+            self.pages[page] = {"hash": key[0],
+                                "textIds": list(entry.get("textIds", [])),
+                                "imageIds": list(entry.get("imageIds", []))}
+            if old_page != page:
+                self.moved_pages[page] = old_page
+
+        # Stored pages that no new page matched
+        self.stale_chunk_ids = [cid for _, entry in stored.values() for cid in _chunk_ids(entry)]
+
+        self.written_ids = set()
+        self._duplicates = defaultdict(int)
+
+    @staticmethod
+    def _copies(hashes):
+        seen = defaultdict(int)
+        copies = []
+        for page_hash in hashes:
+            copies.append(seen[page_hash])
+            seen[page_hash] += 1
+        return copies
+
+    def assign_ids(self, docs):
+        """
+        Chunk IDs for a batch of freshly embedded chunks, in order
+
+        Identical chunks on one page are told apart by the order extraction
+        produces them in, which is stable across runs.
+        """
+        ids = []
+        for doc in docs:
+            page = doc.metadata.get("page")
+            content_hash = _content_hash(doc)
+            duplicate = self._duplicates[(page, content_hash)]
+            self._duplicates[(page, content_hash)] += 1
+            ids.append(chunk_id(self.doc_id, self.hashes[page], self.copies[page],
+                                content_hash, duplicate))
+
+            field = "imageIds" if doc.metadata.get("type") == "image" else "textIds"
+            self.pages[page][field].append(ids[-1])
+        self.written_ids.update(ids)
+        return ids
+
+    def moves(self):
+        """
+        Chunks of unchanged pages that moved, with their new page number
+
+        Returns:
+            List[Tuple[str, int, str]]: (chunk ID, new 0-indexed page, "text" or "image")
+        """
+        return [
+            (cid, page, kind)
+            for page in sorted(self.moved_pages)
+            for kind, field in (("text", "textIds"), ("image", "imageIds"))
+            for cid in self.pages[page][field]
+        ]
+
+    def add_stale(self, chunk_ids):
+        """Also delete these chunks (e.g. legacy auto-ID chunks) unless rewritten"""
+        self.stale_chunk_ids.extend(chunk_ids)
+
+    def ids_to_delete(self):
+        """Stale chunk IDs that were not rewritten by this run"""
+        return sorted(set(self.stale_chunk_ids) - self.written_ids)
+
+    def manifest(self):
+        """Manifest pages to store after a successful run"""
+        return [self.pages[page] for page in range(len(self.hashes))]
+
+    def totals(self):
+        """(text chunks, visual chunks) across the whole document"""
+        pages = self.pages.values()
+        return (sum(len(p["textIds"]) for p in pages),
+                sum(len(p["imageIds"]) for p in pages))
@@ -0,0 +1,250 @@
+"""
+Shared caches for source PDFs and images re-extracted from them
+"""
+import asyncio
+import base64
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+import fitz
+from services.http_client import http_client
+from utils.lru_cache import TTLCache
+from config import Config
+
+
+class PDFByteCache:
+    """
+    Content-addressed store of downloaded PDFs, bounded by total bytes
+
+    Bytes are keyed by their SHA-256 digest, with a separate map from file
+    URL to digest, so the same file reached through several URLs is held
+    once. Entries live in RAM, or as files under `directory` when one is
+    given. Concurrent requests for the same URL share a single download.
+
+    Args:
+        max_bytes: int - Total size budget; least recently used PDFs are evicted
+        directory: str - Spill directory (None = keep bytes in memory)
+    """
+
+    def __init__(self, max_bytes: int, directory: str = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()  # digest -> bytes (memory) or size (disk)
+        self._url_digests = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            # Re-adopt files from a previous run, oldest first
+            paths = [os.path.join(directory, name) for name in os.listdir(directory)
+                     if name.endswith(".pdf")]
+            for path in sorted(paths, key=os.path.getmtime):
+                digest = os.path.basename(path)[:-4]
+                size = os.path.getsize(path)
+                self._entries[digest] = size
+                self._total_bytes += size
+            self._evict()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, f"{digest}.pdf")
+
+    @staticmethod
+    def _size(entry) -> int:
+        return entry if isinstance(entry, int) else len(entry)
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            digest, entry = self._entries.popitem(last=False)
+            self._total_bytes -= self._size(entry)
+            if self.directory:
+                try:
+                    os.unlink(self._path(digest))
+                except FileNotFoundError:
+                    pass
+        live = set(self._entries)
+        self._url_digests = {url: d for url, d in self._url_digests.items() if d in live}
+
+    def _lookup(self, url: str):
+        """Return cached bytes for url, or None"""
+        with self._lock:
+            digest = self._url_digests.get(url)
+            if digest is None or digest not in self._entries:
+                return None
+            self._entries.move_to_end(digest)
+            entry = self._entries[digest]
+        if not self.directory:
+            return entry
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            with self._lock:
+                entry = self._entries.pop(digest, None)
+                if entry is not None:
+                    self._total_bytes -= self._size(entry)
+            return None
+
+    def _store(self, url: str, pdf_bytes: bytes):
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        if self.directory and not os.path.exists(self._path(digest)):
+            tmp_path = f"{self._path(digest)}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(tmp_path, self._path(digest))
+
+        with self._lock:
+            if digest not in self._entries:
+                self._entries[digest] = len(pdf_bytes) if self.directory else pdf_bytes
+                self._total_bytes += len(pdf_bytes)
+            self._entries.move_to_end(digest)
+            self._url_digests[url] = digest
+            self._evict()
+
+    async def put(self, url: str, pdf_bytes: bytes):
+        """Add bytes that were already downloaded elsewhere (e.g. at ingestion)"""
+        await asyncio.to_thread(self._store, url, pdf_bytes)
+
+    async def get(self, url: str) -> bytes:
+        """
+        Return the PDF at url, downloading it at most once
+
+        Args:
+            url: str - File URL
+
+        Returns:
+            bytes: PDF content
+
+        Raises:
+            RuntimeError: If the download fails
+            DownloadTooLargeError: If the PDF exceeds Config.HTTP_MAX_DOWNLOAD_BYTES
+        """
+        pdf_bytes = await asyncio.to_thread(self._lookup, url)
+        if pdf_bytes is not None:
+            self.hits += 1
+            return pdf_bytes
+
+        # Single flight: later callers await the download already in progress.
+        # The download runs as its own task, so a caller that gives up (e.g. on
+        # a timeout) doesn't cancel it for everyone else
+        task = self._inflight.get(url)
+        if task is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            task = asyncio.create_task(self._fetch(url))
+            self._inflight[url] = task
+            task.add_done_callback(lambda _: self._inflight.pop(url, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, url: str) -> bytes:
+        pdf_bytes = await self._download(url)
+        await self.put(url, pdf_bytes)
+        return pdf_bytes
+
+    @staticmethod
+    async def _download(url: str) -> bytes:
+        return await http_client.download(url)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": "disk" if self.directory else "memory",
+            "files": len(self._entries),
+            "bytes": self._total_bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 3) if total else None,
+        }
+
+
+def extract_image_base64(pdf_bytes: bytes, page_num: int, img_index: int):
+    """
+    Extract one embedded image from an in-memory PDF
+
+    Args:
+        pdf_bytes: bytes - PDF content
+        page_num: int - Page number (0-indexed)
+        img_index: int - Image index on that page
+
+    Returns:
+        str: Base64 encoded image, or None if the page has no such image
+    """
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        images = doc[page_num].get_images(full=True)
+        if img_index >= len(images):
+            return None
+        base_image = doc.extract_image(images[img_index][0])
+        return base64.b64encode(base_image["image"]).decode()
+
+
+class ImageCache:
+    """
+    Decoded images keyed by (documentId, page, img_index), filled from the
+    shared PDF byte cache on a miss
+
+    Bounded by both entry count and total base64 bytes, since a single
+    full-resolution scan can be several megabytes.
+    """
+
+    def __init__(self, pdf_cache: PDFByteCache, maxsize: int, max_bytes: int):
+        self.pdf_cache = pdf_cache
+        self._images = TTLCache(maxsize, max_bytes=max_bytes)
+        self._inflight = {}
+
+    async def get(self, document_id: str, file_url: str, page_num: int, img_index: int,
+                  timings: dict = None):
+        """
+        Return a page image as base64, extracting it only on a cache miss
+
+        Args:
+            document_id: str - Source document ID
+            file_url: str - URL of the source PDF
+            page_num: int - Page number (0-indexed)
+            img_index: int - Image index on that page
+            timings: dict - Filled with "fetch" and "extract" seconds on a miss
+
+        Returns:
+            str: Base64 encoded image, or None if it no longer exists
+        """
+        key = (document_id, page_num, img_index)
+        img_base64 = self._images.get(key)
+        if img_base64 is not None:
+            return img_base64
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._extract(key, file_url, timings))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _extract(self, key, file_url: str, timings: dict = None):
+        _, page_num, img_index = key
+        start_time = time.perf_counter()
+        pdf_bytes = await self.pdf_cache.get(file_url)
+        fetched_at = time.perf_counter()
+        img_base64 = await asyncio.to_thread(extract_image_base64, pdf_bytes, page_num, img_index)
+        if timings is not None:
+            timings["fetch"] = fetched_at - start_time
+            timings["extract"] = time.perf_counter() - fetched_at
+        if img_base64 is not None:
+            self._images.set(key, img_base64)
+        return img_base64
+
+    def invalidate_document(self, document_id: str):
+        """Drop every cached image of a document (e.g. after it is reprocessed)"""
+        self._images.invalidate_where(lambda key: key[0] == document_id)
+
+    def stats(self) -> dict:
+        return self._images.stats()
+
+# Singleton instances
+pdf_cache = PDFByteCache(Config.PDF_CACHE_MAX_BYTES, Config.PDF_CACHE_DIR or None)
+image_cache = ImageCache(pdf_cache, Config.IMAGE_CACHE_SIZE, Config.IMAGE_CACHE_MAX_BYTES)
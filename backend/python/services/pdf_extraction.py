@@ -0,0 +1,281 @@
+"""
+PyMuPDF page extraction, in-process or sharded across worker processes
+
+This module deliberately avoids importing the embedding model so that
+spawned extraction workers stay lightweight.
+"""
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import fitz  # PyMuPDF
+from PIL import Image
+from langchain_core.documents import Document
+from config import Config
+from services.page_manifest import image_chunk_content
+from services.text_chunking import build_text_splitter
+
+
+def _process_text(text_splitter, text: str, page_num: int, doc_id: str):
+    """Split text content from a page into chunk documents"""
+    temp_doc = Document(
+        page_content=text,
+        metadata={"page": page_num, "type": "text", "documentId": doc_id}
+    )
+
+    return text_splitter.split_documents([temp_doc])
+
+
+def _process_images(page, doc, page_num: int, doc_id: str):
+    """
+    Extract images from a page for embedding
+    Only embeddings are stored - NOT the actual image data
+
+    Returns:
+        tuple: (documents, PIL images)
+    """
+    docs = []
+    images = []
+
+    for img_index, img in enumerate(page.get_images(full=True)):
+        try:
+            xref = img[0]
+            base_image = doc.extract_image(xref)
+            image_bytes = base_image["image"]
+
+            # Convert to PIL Image
+            pil_image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+
+            # Keyed by content, not page number, so a page that moves keeps its thumbnail
+            digest = hashlib.sha256(image_bytes).hexdigest()[:16]
+            image_id = f"{doc_id}_{digest}_img_{img_index}"
+
+            # ✅ Create document with metadata only (no image data)
+            image_doc = Document(
+                page_content=image_chunk_content(page_num),
+                metadata={
+                    "page": page_num,
+                    "type": "image",
+                    "image_id": image_id,
+                    "xref": xref,  # Store xref for potential re-extraction
+                    "documentId": doc_id
+                }
+            )
+            docs.append(image_doc)
+            images.append(pil_image)
+
+        except Exception as e:
+            print(f"      ⚠️ Error processing image {img_index}: {e}")
+            continue
+
+    return docs, images
+
+
+def extract_window(doc, pages, doc_id: str, text_splitter):
+    """
+    Extract text chunks and images from the given pages of an open PDF
+
+    Returns:
+        tuple: (text documents, image documents, PIL images)
+    """
+    text_docs = []
+    image_docs, images = [], []
+
+    for page_num in pages:
+        page = doc[page_num]
+
+        # Process text
+        text = page.get_text()
+        if text.strip():
+            text_docs.extend(_process_text(text_splitter, text, page_num, doc_id))
+
+        # Process images - only embeddings
+        page_image_docs, page_images = _process_images(page, doc, page_num, doc_id)
+        image_docs.extend(page_image_docs)
+        images.extend(page_images)
+
+    return text_docs, image_docs, images
+
+
+def page_hashes(pdf_bytes: bytes, salt: str = ""):
+    """
+    Content hash of every page: its text and the raw streams of its images
+
+    Cheaper than extraction - images are not decoded and text is not split.
+
+    Args:
+        pdf_bytes: PDF file as bytes
+        salt: str - Mixed into every hash (settings that change the chunks)
+
+    Returns:
+        List[str]: One hex digest per page
+    """
+    hashes = []
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        for page in doc:
+            digest = hashlib.sha256(salt.encode("utf-8"))
+            digest.update(page.get_text().encode("utf-8"))
+            for img in page.get_images(full=True):
+                digest.update(b"\0")
+                digest.update(doc.xref_stream_raw(img[0]) or b"")
+            hashes.append(digest.hexdigest()[:32])
+    return hashes
+
+
+# Per-worker state: the PDF currently open in this process
+_worker_state = {"name": None, "shm": None, "view": None, "doc": None, "splitter": None, "timer": None}
+_worker_lock = threading.Lock()
+
+
+def _open_shared_pdf(shm_name: str, size: int):
+    """Attach to the shared PDF and open it in place, without copying it"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    view = shm.buf[:size]
+    try:
+        try:
+            doc = fitz.open(stream=view, filetype="pdf")
+        except TypeError:
+            # PyMuPDF builds without memoryview support need a private copy
+            doc = fitz.open(stream=bytes(view), filetype="pdf")
+            view.release()
+            shm.close()
+            shm = view = None
+    except Exception:
+        if view is not None:
+            view.release()
+            shm.close()
+        raise
+    _worker_state.update(name=shm_name, shm=shm, view=view, doc=doc)
+
+
+def _close_shared_pdf():
+    """Close this worker's PDF and detach from its shared memory (caller holds _worker_lock)"""
+    if _worker_state["doc"] is not None:
+        _worker_state["doc"].close()
+    try:
+        if _worker_state["view"] is not None:
+            _worker_state["view"].release()
+        if _worker_state["shm"] is not None:
+            _worker_state["shm"].close()
+    except BufferError as e:
+        print(f"⚠️ Could not detach shared PDF {_worker_state['name']}: {e}")
+    _worker_state.update(name=None, shm=None, view=None, doc=None)
+
+
+def _close_if_idle(shm_name: str):
+    """Timer callback: release the PDF unless a newer document replaced it"""
+    with _worker_lock:
+        if _worker_state["name"] == shm_name:
+            _close_shared_pdf()
+
+
+def _extract_in_worker(shm_name: str, size: int, doc_id: str, pages):
+    """
+    Worker entry point: open the shared PDF once per document and extract some pages
+
+    The PDF is read straight from shared memory and stays open while the
+    document's windows keep arriving; once no window has come for
+    Config.PDF_WORKER_IDLE_SECONDS it is closed and the mapping released.
+    Images are returned as raw RGB buffers so they pickle cheaply.
+    """
+    with _worker_lock:
+        if _worker_state["timer"] is not None:
+            _worker_state["timer"].cancel()
+
+        if _worker_state["name"] != shm_name:
+            _close_shared_pdf()
+            _open_shared_pdf(shm_name, size)
+
+        if _worker_state["splitter"] is None:
+            _worker_state["splitter"] = build_text_splitter()
+
+        text_docs, image_docs, images = extract_window(
+            _worker_state["doc"], pages, doc_id, _worker_state["splitter"]
+        )
+
+        timer = threading.Timer(Config.PDF_WORKER_IDLE_SECONDS, _close_if_idle, args=(shm_name,))
+        timer.daemon = True
+        timer.start()
+        _worker_state["timer"] = timer
+
+    buffers = [(image.size, image.tobytes()) for image in images]
+    return text_docs, image_docs, buffers
+
+
+class ParallelExtractor:
+    """Shards page windows across a pool of spawned extraction processes"""
+
+    def __init__(self):
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            # spawn, not fork: the parent holds torch threads and open sockets
+            self._pool = ProcessPoolExecutor(
+                max_workers=Config.PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            print(f"🧵 Started {Config.PDF_EXTRACT_WORKERS} PDF extraction workers")
+        return self._pool
+
+    async def iter_windows(self, pdf_bytes: bytes, doc_id: str, pages=None):
+        """
+        Extract every page window in worker processes, yielding in page order
+
+        The PDF is placed in shared memory once; each worker opens it
+        independently. At most PDF_EXTRACT_WORKERS + INGEST_QUEUE_SIZE
+        windows are in flight.
+
+        Args:
+            pdf_bytes: PDF file as bytes
+            doc_id: Document identifier
+            pages: Optional[List[int]] - Only extract these pages
+
+        Yields:
+            tuple: (text documents, image documents, PIL images)
+        """
+        if pages is None:
+            with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+                pages = range(len(doc))
+        pages = list(pages)
+        print(f"📄 Processing {len(pages)} pages across {Config.PDF_EXTRACT_WORKERS} workers...")
+
+        shm = shared_memory.SharedMemory(create=True, size=max(len(pdf_bytes), 1))
+        shm.buf[:len(pdf_bytes)] = pdf_bytes
+
+        loop = asyncio.get_running_loop()
+        window = Config.INGEST_PAGE_WINDOW
+        windows = [pages[s:s + window] for s in range(0, len(pages), window)]
+        max_in_flight = Config.PDF_EXTRACT_WORKERS + Config.INGEST_QUEUE_SIZE
+        pending = []
+
+        try:
+            next_window = 0
+            while next_window < len(windows) or pending:
+                while next_window < len(windows) and len(pending) < max_in_flight:
+                    pending.append(loop.run_in_executor(
+                        self.pool, _extract_in_worker,
+                        shm.name, len(pdf_bytes), doc_id, windows[next_window]
+                    ))
+                    next_window += 1
+
+                text_docs, image_docs, buffers = await pending.pop(0)
+                images = [Image.frombytes("RGB", size, data) for size, data in buffers]
+                yield text_docs, image_docs, images
+        finally:
+            for future in pending:
+                future.cancel()
+            shm.close()
+            shm.unlink()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+# Singleton instance
+parallel_extractor = ParallelExtractor()
@@ -1,29 +1,249 @@
 """
 PDF processing service for extracting text and images
 """
+import asyncio
 import fitz  # PyMuPDF
-import tempfile
-import os
-import io
+import time
 import numpy as np
-from PIL import Image
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from config import Config
 from services.embedding_service import embedding_service
+from services.embedding_store import embedding_store, text_key, image_key
+from langchain_core.documents import Document
+from services.pdf_extraction import extract_window, parallel_extractor
+from services.text_chunking import build_text_splitter, split_windows
+from services.thumbnail_store import thumbnail_store
+
+
+def _text_windows(text_docs):
+    """
+    Texts to embed for a window's text chunks
+    
+    Chunks longer than CLIP's window are split into overlapping sub-windows
+    unless Config.CHUNK_MULTI_VECTOR is "truncate".
+    
+    Returns:
+        tuple: (texts, owners) - owners[i] is the chunk texts[i] came from
+    """
+    texts, owners = [], []
+    for i, doc in enumerate(text_docs):
+        if Config.CHUNK_MULTI_VECTOR == "truncate":
+            windows = [doc.page_content]
+        else:
+            windows = split_windows(doc.page_content)
+        texts.extend(windows)
+        owners.extend([i] * len(windows))
+    return texts, owners
+
+
+def _combine_windows(text_docs, owners, embeddings):
+    """
+    Turn sub-window embeddings back into chunk rows
+    
+    "mean" pools each chunk's sub-windows into one normalized vector;
+    "separate" keeps one row per sub-window, each pointing at the whole chunk.
+    
+    Returns:
+        tuple: (documents, embeddings)
+    """
+    text_docs = list(text_docs)
+    if len(owners) == len(text_docs):
+        return text_docs, embeddings
+    
+    owners = np.asarray(owners)
+    if Config.CHUNK_MULTI_VECTOR == "separate":
+        counts = np.bincount(owners, minlength=len(text_docs))
+        first_rows = np.searchsorted(owners, owners)
+        docs = []
+        for row, owner in enumerate(owners):
+            parent = text_docs[owner]
+            metadata = parent.metadata
+            if counts[owner] > 1:
+                metadata = {**metadata, "window": int(row - first_rows[row])}
+            docs.append(Document(page_content=parent.page_content, metadata=metadata))
+        return docs, embeddings
+    
+    starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+    pooled = np.add.reduceat(embeddings, starts, axis=0)
+    pooled /= np.linalg.norm(pooled, axis=1, keepdims=True)
+    return text_docs, pooled.astype(np.float32)
+
+
+def _cache_lookup(keys):
+    """
+    Split keys into cached vectors and the ones still to embed
+    
+    Returns:
+        tuple: (found, missing) - found maps key -> vector; missing maps each
+        uncached key to the position of its first occurrence
+    """
+    found = embedding_store.get_many(keys)
+    missing = {}
+    for position, key in enumerate(keys):
+        if key not in found and key not in missing:
+            missing[key] = position
+    return found, missing
+
+
+def _cache_merge(keys, found, missing, computed, cache_stats, kind):
+    """
+    Combine cached and freshly computed vectors in key order
+    
+    Returns:
+        tuple: (embeddings, new (key, vector) pairs to store)
+    """
+    new_items = list(zip(missing, computed))
+    found.update(new_items)
+    if cache_stats is not None:
+        cache_stats[f"{kind}Lookups"] += len(keys)
+        cache_stats[f"{kind}Hits"] += len(keys) - len(missing)
+    return np.vstack([found[key] for key in keys]).astype(np.float32), new_items
+
+
+def _drop_failed_images(keys, image_docs, missing, failed):
+    """
+    Remove images that failed to embed, with every repeat of them
+    
+    Args:
+        failed: List[int] - Indices into missing (in order) that failed
+    
+    Returns:
+        tuple: (remaining keys, remaining image documents); the failed keys
+        are also removed from missing
+    """
+    if not failed:
+        return keys, list(image_docs)
+    missing_keys = list(missing)
+    failed_keys = {missing_keys[i] for i in failed}
+    for key in failed_keys:
+        del missing[key]
+    kept = [i for i, key in enumerate(keys) if key not in failed_keys]
+    print(f"      ⚠️ Dropped {len(keys) - len(kept)} image chunk(s) that failed to embed")
+    return [keys[i] for i in kept], [image_docs[i] for i in kept]
+
+
+def _embed_window_steps(text_docs, image_docs, images, cache_stats, embed_texts, embed_images):
+    """
+    The embedding pipeline of one window, shared by embed_window and aembed_window
+    
+    A generator that yields every blocking or inference call as (fn, args)
+    and is sent back its result; the caller decides whether to run it
+    inline or off the event loop. Returns (documents, embeddings).
+    """
+    text_docs = list(text_docs)
+    embeddings = []
+    
+    if text_docs:
+        texts, owners = yield _text_windows, (text_docs,)
+        keys = yield _keys, (text_key, texts)
+        found, missing = yield _cache_lookup, (keys,)
+        computed = (yield embed_texts, ([texts[i] for i in missing.values()],)) if missing else []
+        text_embeddings, new_items = _cache_merge(keys, found, missing, computed, cache_stats, "text")
+        yield embedding_store.put_many, (new_items,)
+        
+        text_docs, text_embeddings = _combine_windows(text_docs, owners, text_embeddings)
+        embeddings.append(text_embeddings)
+    if images:
+        keys = yield _keys, (image_key, images)
+        found, missing = yield _cache_lookup, (keys,)
+        if missing:
+            computed, failed = yield embed_images, ([images[i] for i in missing.values()],)
+        else:
+            computed, failed = [], []
+        keys, image_docs = _drop_failed_images(keys, image_docs, missing, failed)
+        if keys:
+            image_embeddings, new_items = _cache_merge(keys, found, missing, computed, cache_stats, "image")
+            yield embedding_store.put_many, (new_items,)
+            embeddings.append(image_embeddings)
+    
+    docs = text_docs + list(image_docs)
+    
+    if not embeddings:
+        return docs, np.empty((0, 0), dtype=np.float32)
+    return docs, np.vstack(embeddings)
+
+
+def _keys(key_fn, items):
+    return [key_fn(item) for item in items]
+
 
 class PDFProcessor:
     def __init__(self):
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=Config.CHUNK_SIZE,
-            chunk_overlap=Config.CHUNK_OVERLAP
-        )
+        self.text_splitter = build_text_splitter()
+    
+    def iter_page_windows(self, pdf_bytes: bytes, doc_id: str, pages=None):
+        """
+        Read the PDF from memory a window of pages at a time
+        
+        Args:
+            pdf_bytes: PDF file as bytes
+            doc_id: Document identifier
+            pages: Optional[List[int]] - Only extract these pages (default all)
+            
+        Yields:
+            tuple: (text documents, image documents, PIL images) for each
+            window of Config.INGEST_PAGE_WINDOW pages
+        """
+        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+        try:
+            pages = list(range(len(doc)) if pages is None else pages)
+            print(f"📄 Processing {len(pages)} of {len(doc)} pages...")
+            
+            window = Config.INGEST_PAGE_WINDOW
+            for window_start in range(0, len(pages), window):
+                window_pages = pages[window_start:window_start + window]
+                print(f"   Pages {window_pages[0] + 1}-{window_pages[-1] + 1}/{len(doc)}...")
+                
+                yield extract_window(doc, window_pages, doc_id, self.text_splitter)
+        finally:
+            doc.close()
+    
+    @staticmethod
+    def embed_window(text_docs, image_docs, images, cache_stats=None):
+        """
+        Embed one window of extracted chunks and images in batches
+        
+        Texts and images already in the embedding store (repeated headers,
+        footers, logos) are not embedded again.
+        
+        Args:
+            cache_stats: Optional[dict] - Hit/lookup counters to update
+        
+        Returns:
+            tuple: (documents, embeddings) with text chunks first
+        """
+        steps = _embed_window_steps(text_docs, image_docs, images, cache_stats,
+                                    embedding_service.embed_texts, embedding_service.embed_images)
+        try:
+            fn, args = next(steps)
+            while True:
+                fn, args = steps.send(fn(*args))
+        except StopIteration as done:
+            return done.value
+    
+    @staticmethod
+    async def aembed_window(text_docs, image_docs, images, cache_stats=None):
+        """Same as embed_window, on the inference executor at bulk priority"""
+        steps = _embed_window_steps(text_docs, image_docs, images, cache_stats,
+                                    embedding_service.aembed_texts, embedding_service.aembed_images)
+        try:
+            fn, args = next(steps)
+            while True:
+                if asyncio.iscoroutinefunction(fn):
+                    result = await fn(*args)
+                else:
+                    result = await asyncio.to_thread(fn, *args)
+                fn, args = steps.send(result)
+        except StopIteration as done:
+            return done.value
     
     def process_pdf(self, pdf_bytes: bytes, doc_id: str):
         """
         Process PDF and extract text chunks and images with embeddings
         Images are NOT stored - only their embeddings
         
+        Keeps every chunk in memory; use process_pdf_streaming for large
+        documents.
+        
         Args:
             pdf_bytes: PDF file as bytes
             doc_id: Document identifier
@@ -33,104 +253,113 @@ class PDFProcessor:
         """
         all_docs = []
         all_embeddings = []
+        start_time = time.perf_counter()
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(pdf_bytes)
-            tmp_path = tmp_file.name
+        for window in self.iter_page_windows(pdf_bytes, doc_id):
+            docs, embeddings = self.embed_window(*window)
+            all_docs.extend(docs)
+            all_embeddings.extend(embeddings)
         
-        try:
-            doc = fitz.open(tmp_path)
-            print(f"📄 Processing {len(doc)} pages...")
-            
-            for page_num, page in enumerate(doc):
-                print(f"   Page {page_num + 1}/{len(doc)}...")
-                
-                # Process text
-                text = page.get_text()
-                if text.strip():
-                    text_docs, text_embeddings = self._process_text(
-                        text, page_num, doc_id
-                    )
-                    all_docs.extend(text_docs)
-                    all_embeddings.extend(text_embeddings)
-                
-                # Process images - only embeddings
-                image_docs, image_embeddings = self._process_images(
-                    page, doc, page_num, doc_id
-                )
-                all_docs.extend(image_docs)
-                all_embeddings.extend(image_embeddings)
-            
-            doc.close()
-            print(f"✅ Processing complete: {len(all_docs)} chunks created")
-            
-        finally:
-            os.unlink(tmp_path)
+        elapsed = time.perf_counter() - start_time
+        rate = len(all_docs) / elapsed if elapsed > 0 else 0.0
+        print(f"✅ Processing complete: {len(all_docs)} chunks created "
+              f"in {elapsed:.1f}s ({rate:.1f} chunks/sec)")
         
         return all_docs, np.array(all_embeddings)
     
-    def _process_text(self, text: str, page_num: int, doc_id: str):
-        """Process text content from a page"""
-        docs = []
-        embeddings = []
-        
-        temp_doc = Document(
-            page_content=text,
-            metadata={"page": page_num, "type": "text", "documentId": doc_id}
-        )
-        
-        text_chunks = self.text_splitter.split_documents([temp_doc])
+    async def process_pdf_streaming(self, pdf_bytes: bytes, doc_id: str, on_batch, pages=None):
+        """
+        Process PDF as a pipeline of overlapping stages
         
-        for chunk in text_chunks:
-            embedding = embedding_service.embed_text(chunk.page_content)
-            embeddings.append(embedding)
-            docs.append(chunk)
+        Page extraction, embedding and the on_batch sink run concurrently and
+        are connected by bounded queues, so at most a few windows of pages
+        are held in memory regardless of document size. With
+        Config.PDF_EXTRACT_WORKERS > 0 extraction is sharded across worker
+        processes. When a thumbnail store is configured, a downscaled copy of
+        each image is saved while the window is embedded.
         
-        return docs, embeddings
-    
-    def _process_images(self, page, doc, page_num: int, doc_id: str):
-        """
-        Process images from a page
-        Only store embeddings - NOT the actual image data
+        Args:
+            pdf_bytes: PDF file as bytes
+            doc_id: Document identifier
+            on_batch: async callable(docs, embeddings) - Persists one window
+            pages: Optional[List[int]] - Only process these pages (default all)
+            
+        Returns:
+            dict: Chunk counts, throughput and embedding cache hit rate for the document
         """
-        docs = []
-        embeddings = []
+        extracted = asyncio.Queue(maxsize=Config.INGEST_QUEUE_SIZE)
+        embedded = asyncio.Queue(maxsize=Config.INGEST_QUEUE_SIZE)
+        stats = {"totalChunks": 0, "textChunks": 0, "visualChunks": 0, "thumbnailBytes": 0}
+        cache_stats = {"textLookups": 0, "textHits": 0, "imageLookups": 0, "imageHits": 0}
+        start_time = time.perf_counter()
         
-        for img_index, img in enumerate(page.get_images(full=True)):
-            try:
-                xref = img[0]
-                base_image = doc.extract_image(xref)
-                image_bytes = base_image["image"]
-                
-                # Convert to PIL Image
-                pil_image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-                
-                # Create unique identifier
-                image_id = f"{doc_id}_page_{page_num}_img_{img_index}"
-                
-                # ✅ Embed image using CLIP
-                embedding = embedding_service.embed_image(pil_image)
-                embeddings.append(embedding)
-                
-                # ✅ Create document with metadata only (no image data)
-                image_doc = Document(
-                    page_content=f"[Image on page {page_num + 1}]",
-                    metadata={
-                        "page": page_num,
-                        "type": "image",
-                        "image_id": image_id,
-                        "xref": xref,  # Store xref for potential re-extraction
-                        "documentId": doc_id
-                    }
+        async def extract_stage():
+            if Config.PDF_EXTRACT_WORKERS > 0:
+                async for window in parallel_extractor.iter_windows(pdf_bytes, doc_id, pages):
+                    await extracted.put(window)
+            else:
+                windows = self.iter_page_windows(pdf_bytes, doc_id, pages)
+                pending = None
+                try:
+                    while True:
+                        # Shielded so a cancelled pipeline still knows when the thread is done
+                        pending = asyncio.ensure_future(asyncio.to_thread(next, windows, None))
+                        window = await asyncio.shield(pending)
+                        if window is None:
+                            break
+                        await extracted.put(window)
+                finally:
+                    # A generator can't be closed while another thread is running it
+                    if pending is not None and not pending.done():
+                        await asyncio.wait([pending])
+                    windows.close()
+            await extracted.put(None)
+        
+        async def embed_stage():
+            while (window := await extracted.get()) is not None:
+                _, image_docs, images = window
+                batch, thumbnail_bytes = await asyncio.gather(
+                    self.aembed_window(*window, cache_stats=cache_stats),
+                    thumbnail_store.save_window(image_docs, images)
                 )
-                docs.append(image_doc)
-                print(f"      ✅ Processed image {img_index} (embedding only)")
-                
-            except Exception as e:
-                print(f"      ⚠️ Error processing image {img_index}: {e}")
-                continue
+                stats["thumbnailBytes"] += thumbnail_bytes
+                await embedded.put(batch)
+            await embedded.put(None)
         
-        return docs, embeddings
-
+        async def store_stage():
+            while (batch := await embedded.get()) is not None:
+                docs, embeddings = batch
+                if not docs:
+                    continue
+                await on_batch(docs, embeddings)
+                stats["totalChunks"] += len(docs)
+                stats["textChunks"] += sum(1 for d in docs if d.metadata.get("type") == "text")
+                stats["visualChunks"] += sum(1 for d in docs if d.metadata.get("type") == "image")
+        
+        tasks = [
+            asyncio.create_task(extract_stage()),
+            asyncio.create_task(embed_stage()),
+            asyncio.create_task(store_stage()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        elapsed = time.perf_counter() - start_time
+        stats["chunksPerSecond"] = round(stats["totalChunks"] / elapsed, 1) if elapsed > 0 else 0.0
+        lookups = cache_stats["textLookups"] + cache_stats["imageLookups"]
+        hits = cache_stats["textHits"] + cache_stats["imageHits"]
+        stats["embeddingCache"] = {**cache_stats, "hitRate": round(hits / lookups, 3) if lookups else 0.0}
+        print(f"✅ Processing complete: {stats['totalChunks']} chunks stored "
+              f"in {elapsed:.1f}s ({stats['chunksPerSecond']} chunks/sec, "
+              f"{stats['embeddingCache']['hitRate']:.0%} embedding cache hits)")
+        
+        return stats
+    
 # Singleton instance
 pdf_processor = PDFProcessor()
\ No newline at end of file
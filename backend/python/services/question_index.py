@@ -0,0 +1,138 @@
+"""
+In-memory semantic cache index over the cached questions collection
+"""
+import threading
+import numpy as np
+from database.firebase_client import firebase_client
+from services.ann_index import build_ann_index
+from utils.entity_extractor import entity_key
+from utils.row_buffer import RowBuffer
+from utils.vector_codec import decode_embedding
+
+
+class _Bucket:
+    """
+    Pre-normalized embeddings of the questions sharing one (intent, entities) key
+
+    Extending a bucket appends into a shared, doubling buffer and a shared
+    ids list; each bucket object sees only its first len(matrix) rows.
+    """
+    __slots__ = ("ids", "buffer", "matrix", "ann")
+
+    def __init__(self, ids: list, matrix: np.ndarray):
+        self.ids = list(ids)
+        self.buffer = RowBuffer.from_array(matrix)
+        self.matrix = self.buffer.view()
+        self.ann = build_ann_index(self.matrix)
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def extended(self, question_id: str, vector: np.ndarray):
+        bucket = _Bucket.__new__(_Bucket)
+        self.ids.append(question_id)
+        bucket.ids = self.ids
+        bucket.buffer = self.buffer
+        bucket.matrix = self.buffer.append(vector)
+        bucket.ann = self.ann.extended(bucket.matrix)
+        return bucket
+
+
+class QuestionIndex:
+    """
+    Cached question embeddings grouped by (intent, entity key)
+
+    Only questions with the same intent and entities can be a cache hit, so a
+    lookup is a single dot product against one bucket.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def is_loaded(self):
+        return self._loaded
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    @staticmethod
+    def _bucket_key(intent: str, entities: dict):
+        return (intent, entity_key(entities))
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def load(self):
+        """Stream the questions collection once and build every bucket"""
+        db = firebase_client.db
+        if not db:
+            print("⚠️ Firebase not available, question index left empty")
+            return
+
+        print("📥 Loading cached questions into question index...")
+
+        grouped = {}
+        for doc in db.collection("questions").stream():
+            data = doc.to_dict()
+            embedding = decode_embedding(data)
+            if embedding is None:
+                continue
+            key = self._bucket_key(data.get("intent"), data.get("entities", {}))
+            ids, vectors = grouped.setdefault(key, ([], []))
+            ids.append(doc.id)
+            vectors.append(self._normalize(embedding))
+
+        buckets = {
+            key: _Bucket(ids, np.ascontiguousarray(np.vstack(vectors)))
+            for key, (ids, vectors) in grouped.items()
+        }
+
+        with self._lock:
+            self._buckets = buckets
+            self._loaded = True
+
+        print(f"✅ Question index loaded: {len(self)} questions in {len(buckets)} buckets")
+
+    def add(self, question_id: str, embedding, intent: str, entities: dict):
+        """Add a newly cached question to its bucket (blocking; call from a worker thread)"""
+        key = self._bucket_key(intent, entities)
+        vector = self._normalize(embedding).reshape(1, -1)
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = _Bucket([question_id], vector)
+            else:
+                bucket = bucket.extended(question_id, vector)
+            self._buckets[key] = bucket
+
+    def find_best(self, question_embedding, intent: str, entities: dict):
+        """
+        Best cached question with the same intent and entities
+
+        Args:
+            question_embedding: np.ndarray - Query embedding
+            intent: str - Detected intent
+            entities: dict - Extracted entities
+
+        Returns:
+            Optional[Tuple[str, float, int]]: (question id, similarity, candidates checked)
+        """
+        bucket = self._buckets.get(self._bucket_key(intent, entities))
+        if bucket is None:
+            return None
+
+        rows, scores = bucket.ann.search(self._normalize(question_embedding), 1)
+        if not len(rows):
+            return None
+
+        return bucket.ids[rows[0]], float(scores[0]), len(bucket)
+
+# Singleton instance
+question_index = QuestionIndex()
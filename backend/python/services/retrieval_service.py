@@ -1,77 +1,32 @@
 """
 Vector retrieval service for finding relevant chunks
 """
-import numpy as np
-from langchain_core.documents import Document
+import asyncio
 from fastapi import HTTPException
 from database.firebase_client import firebase_client
-from services.embedding_service import embedding_service
+from database.document_repository import document_repository
+from services.vector_index import vector_index
 from config import Config
 
 class RetrievalService:
     @staticmethod
-    def retrieve_multimodal(query_embedding, document_ids=None, k=None):
+    async def retrieve_multimodal(query_embedding, document_ids=None, k=None):
         """
-        Retrieve relevant chunks from Firebase using CLIP similarity
+        Retrieve relevant chunks using CLIP similarity against the in-memory vector index
         """
         if k is None:
             k = Config.TOP_K_RETRIEVAL
         
-        db = firebase_client.db
-        if not db:
-            raise HTTPException(status_code=500, detail="Firebase not initialized")
+        if not vector_index.is_loaded:
+            if not firebase_client.db:
+                raise HTTPException(status_code=500, detail="Firebase not initialized")
+            await firebase_client.run(vector_index.load)
         
-        print(f"🔍 Retrieving chunks from Firebase...")
+        print(f"🔍 Retrieving chunks from vector index ({len(vector_index)} chunks)...")
         
-        chunks_ref = db.collection('chunks')
-        
-        # Build query
-        if document_ids and len(document_ids) <= 10:
-            query = chunks_ref.where('documentId', 'in', document_ids)
-        else:
-            query = chunks_ref
-        
-        chunks_snapshot = query.stream()
-        
-        # Score all chunks
-        scored_chunks = []
-        
-        for chunk_doc in chunks_snapshot:
-            chunk_data = chunk_doc.to_dict()
-            
-            if 'embedding' not in chunk_data:
-                continue
-            
-            # Filter by document IDs if list is too large for 'in' query
-            if document_ids and len(document_ids) > 10:
-                if chunk_data.get('documentId') not in document_ids:
-                    continue
-            
-            # Calculate similarity
-            chunk_embedding = np.array(chunk_data['embedding'])
-            similarity = embedding_service.cosine_similarity(
-                query_embedding, 
-                chunk_embedding
-            )
-            
-            # Create Document object - NO image data
-            doc = Document(
-                page_content=chunk_data.get('content', ''),
-                metadata={
-                    'page': chunk_data.get('metadata', {}).get('pageNumber'),
-                    'type': chunk_data.get('type', 'text'),
-                    'image_id': chunk_data.get('metadata', {}).get('imageId'),
-                    'documentId': chunk_data.get('documentId'),
-                    'similarity': float(similarity),
-                    'xref': chunk_data.get('metadata', {}).get('xref')  # For re-extraction if needed
-                }
-            )
-            
-            scored_chunks.append((doc, similarity))
-        
-        # Sort by similarity and get top k
-        scored_chunks.sort(key=lambda x: x[1], reverse=True)
-        top_chunks = [doc for doc, score in scored_chunks[:k]]
+        # Off the loop: HNSW searches wait on the graph lock while ingestion inserts
+        scored_chunks = await asyncio.to_thread(vector_index.search, query_embedding, k, document_ids)
+        top_chunks = [doc for doc, score in scored_chunks]
         
         print(f"✅ Retrieved {len(top_chunks)} chunks")
         if top_chunks:
@@ -80,7 +35,7 @@ class RetrievalService:
         return top_chunks
     
     @staticmethod
-    def prepare_sources(context_docs):
+    async def prepare_sources(context_docs):
         """
         Prepare source information from retrieved documents
         
@@ -90,24 +45,21 @@ class RetrievalService:
         Returns:
             List[Dict]: Formatted source information
         """
-        db = firebase_client.db
-        sources = []
+        # One batched lookup for every document the chunks came from
+        try:
+            metadata = await document_repository.get_many(
+                doc.metadata.get('documentId') for doc in context_docs
+            )
+        except Exception as e:
+            print(f"Error fetching document metadata: {e}")
+            metadata = {}
         
+        sources = []
         for doc in context_docs:
             doc_id = doc.metadata.get('documentId')
-            doc_name = "Document"
-            file_url = None
-            
-            # Get document metadata from Firebase
-            if doc_id and db:
-                try:
-                    doc_ref = db.collection('documents').document(doc_id).get()
-                    if doc_ref.exists:
-                        doc_data = doc_ref.to_dict()
-                        doc_name = doc_data.get('name', 'Document')
-                        file_url = doc_data.get('fileUrl')
-                except Exception as e:
-                    print(f"Error fetching document metadata: {e}")
+            doc_data = metadata.get(doc_id) or {}
+            doc_name = doc_data.get('name', 'Document')
+            file_url = doc_data.get('fileUrl')
             
             content = doc.page_content
             if len(content) > 150:
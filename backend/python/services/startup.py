@@ -0,0 +1,134 @@
+"""
+Concurrent, timed loading of the service's heavy components
+"""
+import asyncio
+import importlib
+import time
+
+
+class _Component:
+    def __init__(self, name: str, module: str, attribute: str, load, depends_on):
+        self.name = name
+        self.module = module
+        self.attribute = attribute
+        self.load = load
+        self.depends_on = depends_on
+        self.task = None
+        self.status = "pending"
+        self.import_seconds = None
+        self.load_seconds = None
+        self.error = None
+
+
+class StartupOrchestrator:
+    """
+    Imports and loads registered components in background threads, all at once
+
+    The app starts serving immediately; routes that need a component await
+    it with get(), and readiness reports when every component has loaded.
+    Each component's import and load times are recorded separately.
+    """
+
+    def __init__(self):
+        self._components = {}
+        self._started_at = None
+        self._finished_at = None
+
+    def register(self, name: str, module: str, attribute: str = None, load=None, depends_on=()):
+        """
+        Add a component to load at startup
+
+        Args:
+            name: str - Component name used by get() and in status reports
+            module: str - Module to import
+            attribute: str - Object to take from the module (None = the module)
+            load: callable(obj) - Blocking initialization run after the import
+            depends_on: Tuple[str] - Components that must be ready first
+        """
+        self._components[name] = _Component(name, module, attribute, load, tuple(depends_on))
+
+    def start(self):
+        """Begin loading every component on the running event loop"""
+        if self._started_at is not None:
+            return
+        self._started_at = time.perf_counter()
+        for component in self._components.values():
+            component.task = asyncio.create_task(self._load(component))
+            # Failures surface through get() and status(), not as unhandled task errors
+            component.task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        asyncio.create_task(self._report())
+
+    async def _load(self, component: _Component):
+        try:
+            for dependency in component.depends_on:
+                await self.get(dependency)
+
+            component.status = "loading"
+            start_time = time.perf_counter()
+            module = await asyncio.to_thread(importlib.import_module, component.module)
+            component.import_seconds = time.perf_counter() - start_time
+
+            obj = getattr(module, component.attribute) if component.attribute else module
+            if component.load is not None:
+                start_time = time.perf_counter()
+                await asyncio.to_thread(component.load, obj)
+                component.load_seconds = time.perf_counter() - start_time
+        except Exception as e:
+            component.status = "failed"
+            component.error = str(e)
+            print(f"❌ Failed to load {component.name}: {e}")
+            raise
+
+        component.status = "ready"
+        return obj
+
+    async def _report(self):
+        await asyncio.gather(*[c.task for c in self._components.values()], return_exceptions=True)
+        self._finished_at = time.perf_counter()
+        print(f"🚀 Startup finished in {self._finished_at - self._started_at:.1f}s")
+        for component in self._components.values():
+            print(f"   {component.name:<16} {component.status:<8}"
+                  f" import {self._format_seconds(component.import_seconds)}"
+                  f"  load {self._format_seconds(component.load_seconds)}")
+
+    @staticmethod
+    def _format_seconds(seconds):
+        return f"{seconds:6.2f}s" if seconds is not None else "     -"
+
+    async def get(self, name: str):
+        """
+        Wait for a component and return it
+
+        Raises:
+            Exception: Whatever made the component fail to load
+        """
+        self.start()
+        return await asyncio.shield(self._components[name].task)
+
+    @property
+    def is_ready(self) -> bool:
+        return bool(self._components) and all(
+            c.status == "ready" for c in self._components.values()
+        )
+
+    def status(self) -> dict:
+        """Per-component load state and timings"""
+        elapsed = None
+        if self._started_at is not None:
+            elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+        return {
+            "ready": self.is_ready,
+            "seconds": round(elapsed, 2) if elapsed is not None else None,
+            "components": {
+                c.name: {
+                    "status": c.status,
+                    "importSeconds": round(c.import_seconds, 3) if c.import_seconds is not None else None,
+                    "loadSeconds": round(c.load_seconds, 3) if c.load_seconds is not None else None,
+                    "error": c.error,
+                }
+                for c in self._components.values()
+            },
+        }
+
+# Singleton instance
+startup = StartupOrchestrator()
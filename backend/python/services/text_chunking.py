@@ -0,0 +1,69 @@
+"""
+Text splitters sized in CLIP tokens
+
+CLIP's text tower sees at most 77 tokens (75 plus BOS/EOS); anything past
+that is truncated before embedding. Sizing chunks with the CLIP tokenizer
+keeps every stored character inside the embedded window. Only the
+tokenizer is loaded, so extraction workers stay lightweight.
+"""
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from config import Config
+
+_tokenizer = None
+_window_splitter = None
+
+
+def clip_tokenizer():
+    """The CLIP tokenizer, loaded once per process"""
+    global _tokenizer
+    if _tokenizer is None:
+        from transformers import CLIPTokenizerFast
+        _tokenizer = CLIPTokenizerFast.from_pretrained(Config.CLIP_MODEL_NAME)
+    return _tokenizer
+
+
+def clip_token_length(text: str) -> int:
+    """Number of CLIP tokens in text, excluding BOS/EOS"""
+    return len(clip_tokenizer()(text, add_special_tokens=False, verbose=False)["input_ids"])
+
+
+def build_text_splitter():
+    """
+    Text splitter used for every page
+
+    Config.CHUNK_UNIT "tokens" sizes chunks in CLIP tokens
+    (CHUNK_TOKENS / CHUNK_TOKEN_OVERLAP); "chars" keeps the original
+    character-based splitter (CHUNK_SIZE / CHUNK_OVERLAP).
+    """
+    if Config.CHUNK_UNIT == "tokens":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=Config.CHUNK_TOKENS,
+            chunk_overlap=Config.CHUNK_TOKEN_OVERLAP,
+            length_function=clip_token_length
+        )
+    return RecursiveCharacterTextSplitter(
+        chunk_size=Config.CHUNK_SIZE,
+        chunk_overlap=Config.CHUNK_OVERLAP
+    )
+
+
+def split_windows(text: str):
+    """
+    Split text into overlapping pieces that each fit one CLIP pass
+
+    Args:
+        text: str - Chunk text
+
+    Returns:
+        List[str]: [text] when it already fits, otherwise its sub-windows
+    """
+    global _window_splitter
+    if clip_token_length(text) <= Config.CLIP_TEXT_WINDOW:
+        return [text]
+    if _window_splitter is None:
+        _window_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=Config.CLIP_TEXT_WINDOW,
+            chunk_overlap=Config.CHUNK_TOKEN_OVERLAP,
+            length_function=clip_token_length
+        )
+    return _window_splitter.split_text(text) or [text]
@@ -0,0 +1,212 @@
+"""
+Downscaled image thumbnails written at ingestion time
+
+Multimodal answers read images from here instead of re-downloading and
+re-parsing the source PDF.
+"""
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import threading
+from PIL import Image
+from config import Config
+
+CONTENT_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+def make_thumbnail(image: Image.Image):
+    """
+    Downscale and recompress an image for the LLM
+
+    Args:
+        image: PIL.Image - Decoded RGB image
+
+    Returns:
+        tuple: (encoded bytes, content type)
+    """
+    thumbnail = image.copy()
+    thumbnail.thumbnail((Config.THUMBNAIL_MAX_SIZE, Config.THUMBNAIL_MAX_SIZE))
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format=Config.THUMBNAIL_FORMAT, quality=Config.THUMBNAIL_QUALITY)
+    return buffer.getvalue(), CONTENT_TYPES[Config.THUMBNAIL_FORMAT]
+
+
+class LocalBlobStore:
+    """
+    Content-addressed blobs on local disk
+
+    Blobs are stored once per SHA-256 digest under blobs/, and keys/ maps
+    each image_id to its digest, so identical images across documents
+    share one file. The directories are scanned once when the store is
+    opened; after that the counters are kept up to date as blobs are written.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._blobs = os.path.join(directory, "blobs")
+        self._keys = os.path.join(directory, "keys")
+        os.makedirs(self._blobs, exist_ok=True)
+        os.makedirs(self._keys, exist_ok=True)
+        self._lock = threading.Lock()
+
+        sizes = [entry.stat().st_size for entry in os.scandir(self._blobs)
+                 if entry.is_file() and not entry.name.endswith(".tmp")]
+        self._blob_count = len(sizes)
+        self._disk_bytes = sum(sizes)
+        self._key_count = sum(1 for entry in os.scandir(self._keys) if entry.is_file())
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blobs, digest)
+
+    def _key_path(self, key: str) -> str:
+        return os.path.join(self._keys, os.path.basename(key))
+
+    def put(self, key: str, data: bytes, content_type: str):
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if not os.path.exists(self._blob_path(digest)):
+                tmp_path = f"{self._blob_path(digest)}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, self._blob_path(digest))
+                self._blob_count += 1
+                self._disk_bytes += len(data)
+            if not os.path.exists(self._key_path(key)):
+                self._key_count += 1
+            with open(self._key_path(key), "w") as f:
+                f.write(f"{digest} {content_type}")
+
+    def get(self, key: str):
+        try:
+            with open(self._key_path(key)) as f:
+                digest, content_type = f.read().split(" ", 1)
+            with open(self._blob_path(digest), "rb") as f:
+                return f.read(), content_type
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def stats(self) -> dict:
+        return {
+            "backend": "local",
+            "keys": self._key_count,
+            "blobs": self._blob_count,
+            "diskBytes": self._disk_bytes,
+        }
+
+
+class FirebaseBlobStore:
+    """Blobs in a Cloud Storage bucket through the Firebase Admin SDK"""
+
+    def __init__(self, bucket_name: str, prefix: str = "thumbnails"):
+        from firebase_admin import storage
+        self._bucket = storage.bucket(bucket_name)
+        self._prefix = prefix
+        self._bytes_written = 0
+        self._blobs_written = 0
+
+    def put(self, key: str, data: bytes, content_type: str):
+        blob = self._bucket.blob(f"{self._prefix}/{key}")
+        blob.upload_from_string(data, content_type=content_type)
+        self._bytes_written += len(data)
+        self._blobs_written += 1
+
+    def get(self, key: str):
+        blob = self._bucket.get_blob(f"{self._prefix}/{key}")
+        if blob is None:
+            return None
+        return blob.download_as_bytes(), blob.content_type
+
+    def stats(self) -> dict:
+        # Listing the bucket is too slow for a metrics call - report this process's writes
+        return {
+            "backend": "firebase",
+            "blobsWritten": self._blobs_written,
+            "bytesWritten": self._bytes_written,
+        }
+
+
+class ThumbnailStore:
+    """
+    Writes thumbnails during ingestion and serves them to LLMService
+
+    Disabled unless Config.THUMBNAIL_STORE is "local" or "firebase"; when
+    disabled every lookup misses and callers fall back to re-extraction.
+    """
+
+    def __init__(self):
+        self._store = None
+        self._initialized = False
+
+    @property
+    def store(self):
+        if not self._initialized:
+            self._initialized = True
+            if Config.THUMBNAIL_STORE == "local":
+                self._store = LocalBlobStore(Config.THUMBNAIL_DIR)
+            elif Config.THUMBNAIL_STORE == "firebase":
+                self._store = FirebaseBlobStore(Config.THUMBNAIL_BUCKET)
+            elif Config.THUMBNAIL_STORE:
+                raise ValueError(f"Unknown THUMBNAIL_STORE: {Config.THUMBNAIL_STORE}")
+        return self._store
+
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+
+    def _save(self, image_docs, images) -> int:
+        written = 0
+        for doc, image in zip(image_docs, images):
+            try:
+                data, content_type = make_thumbnail(image)
+                self.store.put(doc.metadata["image_id"], data, content_type)
+                written += len(data)
+            except Exception as e:
+                print(f"      ⚠️ Error storing thumbnail {doc.metadata.get('image_id')}: {e}")
+        return written
+
+    async def save_window(self, image_docs, images) -> int:
+        """
+        Store a thumbnail for every image of an extracted window
+
+        Args:
+            image_docs: List[Document] - Image chunks (metadata carries image_id)
+            images: List[PIL.Image] - The matching decoded images
+
+        Returns:
+            int: Bytes written
+        """
+        if not self.enabled or not images:
+            return 0
+        return await asyncio.to_thread(self._save, image_docs, images)
+
+    async def get_base64(self, image_id: str):
+        """
+        Return a stored thumbnail
+
+        Args:
+            image_id: str - Image identifier assigned at extraction
+
+        Returns:
+            tuple: (base64 data, content type), or None if not stored
+        """
+        if not self.enabled or not image_id:
+            return None
+        try:
+            found = await asyncio.to_thread(self.store.get, image_id)
+        except Exception as e:
+            print(f"⚠️ Thumbnail lookup failed for {image_id}: {e}")
+            return None
+        if found is None:
+            return None
+        data, content_type = found
+        return base64.b64encode(data).decode(), content_type
+
+    def stats(self) -> dict:
+        if not self.enabled:
+            return {"backend": None}
+        return self.store.stats()
+
+# Singleton instance
+thumbnail_store = ThumbnailStore()
@@ -0,0 +1,339 @@
+"""
+In-memory vector index over the Firestore chunks collection
+"""
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from config import Config
+from database.firebase_client import firebase_client
+from services.ann_index import build_ann_index
+from services.page_manifest import image_chunk_content
+from utils.row_buffer import RowBuffer
+from utils.vector_codec import decode_embedding
+
+
+class _Snapshot:
+    """
+    Immutable view of the index so searches never see a half-applied update
+
+    matrix, document_ids and live are views into the index's growable
+    buffers, and the metadata lists are shared append-only lists: entries
+    past len(matrix) belong to newer snapshots and are never read through
+    this one. Deleted rows stay in place with live=False until compaction.
+    """
+    __slots__ = ("matrix", "ann", "live", "deleted", "chunk_ids", "document_ids", "types",
+                 "pages", "contents", "image_ids", "xrefs")
+
+    def __init__(self, matrix, ann, live, deleted, chunk_ids, document_ids, types, pages,
+                 contents, image_ids, xrefs):
+        self.matrix = matrix
+        self.ann = ann
+        self.live = live
+        self.deleted = deleted
+        self.chunk_ids = chunk_ids
+        self.document_ids = document_ids
+        self.types = types
+        self.pages = pages
+        self.contents = contents
+        self.image_ids = image_ids
+        self.xrefs = xrefs
+
+    @classmethod
+    def empty(cls, dim: int = 0):
+        matrix = np.empty((0, dim), dtype=np.float32)
+        return cls(
+            matrix, build_ann_index(matrix), np.empty(0, dtype=bool), 0,
+            [], np.empty(0, dtype=object), [], [], [], [], []
+        )
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+
+class VectorIndex:
+    """
+    Resident copy of every chunk embedding as one contiguous float32 matrix
+    with parallel metadata arrays; queries go through the ANN backend chosen
+    by build_ann_index (exact matrix-vector product for small corpora)
+
+    New chunks are appended into preallocated buffers that double in
+    capacity, so adding a window costs time proportional to the window, not
+    the corpus. Removed chunks are masked out through a map from chunk ID to
+    row; the index is only rebuilt once Config.ANN_COMPACT_FRACTION of its
+    rows are deleted. Updates are blocking; call them from a worker thread.
+    """
+
+    def __init__(self):
+        self._snapshot = _Snapshot.empty()
+        self._vectors = None  # RowBuffer behind the current snapshot's matrix
+        self._document_ids = RowBuffer(object)
+        self._live = RowBuffer(bool)
+        self._rows = {}  # chunk ID -> row of its live entry
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    @property
+    def is_loaded(self):
+        return self._loaded
+
+    def __len__(self):
+        snapshot = self._snapshot
+        return len(snapshot) - snapshot.deleted
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize rows so a dot product equals cosine similarity"""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def load(self):
+        """Stream the chunks collection once and build the index"""
+        db = firebase_client.db
+        if not db:
+            print("⚠️ Firebase not available, vector index left empty")
+            return
+
+        print("📥 Loading chunk embeddings into vector index...")
+
+        vectors = []
+        chunk_ids, document_ids, types, pages = [], [], [], []
+        contents, image_ids, xrefs = [], [], []
+
+        for chunk_doc in db.collection('chunks').stream():
+            chunk_data = chunk_doc.to_dict()
+            embedding = decode_embedding(chunk_data)
+            if embedding is None:
+                continue
+
+            metadata = chunk_data.get('metadata', {})
+            vectors.append(embedding)
+            chunk_ids.append(chunk_doc.id)
+            document_ids.append(chunk_data.get('documentId'))
+            types.append(chunk_data.get('type', 'text'))
+            pages.append(metadata.get('pageNumber'))
+            contents.append(chunk_data.get('content', ''))
+            image_ids.append(metadata.get('imageId'))
+            xrefs.append(metadata.get('xref'))
+
+        if vectors:
+            matrix = self._normalize(np.ascontiguousarray(np.vstack(vectors), dtype=np.float32))
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+
+        state = self._fresh_state(matrix, chunk_ids, document_ids, types, pages,
+                                  contents, image_ids, xrefs)
+
+        with self._lock:
+            self._snapshot, self._vectors, self._document_ids, self._live, self._rows = state
+            self._loaded = True
+
+        print(f"✅ Vector index loaded: {len(self)} chunks ({self._snapshot.ann.name} search)")
+
+    @staticmethod
+    def _fresh_state(matrix, chunk_ids, document_ids, types, pages, contents, image_ids, xrefs):
+        """
+        New buffers and ANN index over exactly these rows, all live
+
+        Returns:
+            tuple: (snapshot, vector buffer or None if empty, document ID
+            buffer, live buffer, chunk ID -> row map)
+        """
+        vectors = RowBuffer.from_array(matrix) if len(matrix) else None
+        document_id_buffer = RowBuffer.from_array(np.array(document_ids, dtype=object))
+        live = RowBuffer.from_array(np.ones(len(matrix), dtype=bool))
+        matrix = vectors.view() if vectors is not None else matrix
+        chunk_ids = list(chunk_ids)
+        snapshot = _Snapshot(
+            matrix, build_ann_index(matrix), live.view(), 0, chunk_ids, document_id_buffer.view(),
+            list(types), list(pages), list(contents), list(image_ids), list(xrefs)
+        )
+        rows = {chunk_id: row for row, chunk_id in enumerate(chunk_ids)}
+        return snapshot, vectors, document_id_buffer, live, rows
+
+    def _tombstone(self, chunk_ids) -> int:
+        """
+        Mark chunks deleted (caller holds the lock)
+
+        The live mask is copied before it is edited, so snapshots already
+        handed to searches keep their own view.
+
+        Returns:
+            int: Number of rows newly marked deleted
+        """
+        rows = [self._rows.pop(chunk_id) for chunk_id in chunk_ids if chunk_id in self._rows]
+        if rows:
+            self._live = self._live.copy()
+            self._live.view()[rows] = False
+        return len(rows)
+
+    def _publish(self, matrix, ann, deleted: int):
+        """Make the current buffers searchable, compacting when too many rows are dead"""
+        current = self._snapshot
+        snapshot = _Snapshot(
+            matrix, ann, self._live.view(), deleted, current.chunk_ids, self._document_ids.view(),
+            current.types, current.pages, current.contents, current.image_ids, current.xrefs
+        )
+        if deleted and deleted > Config.ANN_COMPACT_FRACTION * len(snapshot):
+            keep = np.flatnonzero(snapshot.live)
+            snapshot, self._vectors, self._document_ids, self._live, self._rows = self._fresh_state(
+                snapshot.matrix[keep],
+                [snapshot.chunk_ids[i] for i in keep],
+                snapshot.document_ids[keep],
+                [snapshot.types[i] for i in keep],
+                [snapshot.pages[i] for i in keep],
+                [snapshot.contents[i] for i in keep],
+                [snapshot.image_ids[i] for i in keep],
+                [snapshot.xrefs[i] for i in keep],
+            )
+        self._snapshot = snapshot
+
+    def remove_chunks(self, chunk_ids):
+        """
+        Drop chunks from the index
+
+        Args:
+            chunk_ids: Iterable[str] - Firestore IDs of deleted chunks
+
+        Returns:
+            int: Number of chunks removed
+        """
+        with self._lock:
+            removed = self._tombstone(chunk_ids)
+            if removed:
+                current = self._snapshot
+                self._publish(current.matrix, current.ann, current.deleted + removed)
+
+        if removed:
+            print(f"📇 Vector index updated: -{removed} chunks ({len(self)} total)")
+        return removed
+
+    def add_chunks(self, chunk_ids: list, doc_id: str, docs: list, embeddings: np.ndarray):
+        """
+        Append freshly stored chunks to the index, replacing any with the same IDs
+
+        Args:
+            chunk_ids: list - Firestore IDs of the stored chunks
+            doc_id: str - Document identifier
+            docs: List[Document] - Chunk documents
+            embeddings: np.ndarray - Chunk embeddings
+        """
+        if not len(docs):
+            return
+
+        new_vectors = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(docs), -1))
+
+        with self._lock:
+            current = self._snapshot
+            replaced = self._tombstone(chunk_ids)
+
+            start = len(current)
+            if self._vectors is None:
+                self._vectors = RowBuffer(np.float32, new_vectors.shape[1])
+            matrix = self._vectors.append(new_vectors)
+            self._document_ids.append([doc_id] * len(docs))
+            self._live.append(np.ones(len(docs), dtype=bool))
+            self._rows.update((chunk_id, start + i) for i, chunk_id in enumerate(chunk_ids))
+            ann = current.ann.extended(matrix) if start else build_ann_index(matrix)
+
+            # Shared lists: older snapshots only read their first len(matrix) entries
+            current.chunk_ids.extend(chunk_ids)
+            current.types.extend(d.metadata.get('type', 'text') for d in docs)
+            current.pages.extend(d.metadata.get('page') for d in docs)
+            current.contents.extend(d.page_content for d in docs)
+            current.image_ids.extend(d.metadata.get('image_id') for d in docs)
+            current.xrefs.extend(d.metadata.get('xref') for d in docs)
+
+            self._publish(matrix, ann, current.deleted + replaced)
+
+        print(f"📇 Vector index updated: +{len(docs)} chunks ({len(self)} total)")
+
+    def move_chunks(self, moves):
+        """
+        Rewrite the page number of chunks whose page moved
+
+        Page numbers are plain metadata, so they are updated in place
+        rather than published as a new snapshot.
+
+        Args:
+            moves: List[Tuple[str, int, str]] - (chunk ID, new 0-indexed page, chunk type)
+
+        Returns:
+            int: Number of indexed chunks updated
+        """
+        moved = 0
+        with self._lock:
+            snapshot = self._snapshot
+            for chunk_id, page, chunk_type in moves:
+                row = self._rows.get(chunk_id)
+                if row is None:
+                    continue
+                snapshot.pages[row] = page
+                if chunk_type == 'image':
+                    snapshot.contents[row] = image_chunk_content(page)
+                moved += 1
+        return moved
+
+    def search(self, query_embedding, k: int, document_ids=None):
+        """
+        Return the top-k chunks by cosine similarity
+
+        Args:
+            query_embedding: np.ndarray - Query embedding
+            k: int - Number of chunks to return
+            document_ids: Optional[List[str]] - Restrict to these documents
+
+        Returns:
+            List[Tuple[Document, float]]: Chunks with their similarity, best first
+        """
+        snapshot = self._snapshot
+        if not len(snapshot) or k <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0:
+            return []
+        query = query / query_norm
+
+        mask = snapshot.live if snapshot.deleted else None
+        if document_ids:
+            mask = np.isin(snapshot.document_ids, list(document_ids))
+            if snapshot.deleted:
+                mask &= snapshot.live
+            if not mask.any():
+                return []
+
+        # Sub-windows of one chunk share its content; over-fetch, then keep the best per chunk
+        fetch = k * Config.ANN_FILTER_OVERSAMPLE if Config.CHUNK_MULTI_VECTOR == "separate" else k
+        rows, scores = snapshot.ann.search(query, fetch, mask)
+
+        results = []
+        seen = set()
+        for row, score in zip(rows, scores):
+            key = (snapshot.document_ids[row], snapshot.pages[row],
+                   snapshot.image_ids[row], snapshot.contents[row])
+            if key in seen:
+                continue
+            if len(results) == k:
+                break
+            seen.add(key)
+
+            similarity = float(score)
+            doc = Document(
+                page_content=snapshot.contents[row],
+                metadata={
+                    'page': snapshot.pages[row],
+                    'type': snapshot.types[row],
+                    'image_id': snapshot.image_ids[row],
+                    'documentId': snapshot.document_ids[row],
+                    'similarity': similarity,
+                    'xref': snapshot.xrefs[row]
+                }
+            )
+            results.append((doc, similarity))
+
+        return results
+
+# Singleton instance
+vector_index = VectorIndex()
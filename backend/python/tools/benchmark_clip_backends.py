@@ -0,0 +1,155 @@
+"""
+Compare CLIP text-tower backends for accuracy, latency and memory
+
+Usage (from backend/python):
+    python -m tools.benchmark_clip_backends [--backends torch torch-int8 onnx onnx-int8]
+                                            [--min-cosine 0.99]
+
+Each backend is checked against CLIPModel.get_text_features (the "full"
+backend) on the same queries; the script exits non-zero if any backend's
+worst-case cosine similarity falls below --min-cosine. Memory is the
+resident set size of a fresh process that has loaded only that backend.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import numpy as np
+
+QUERIES = [
+    "When is the last date to submit the scholarship form?",
+    "What is the attendance requirement for appearing in end semester exams?",
+    "Library timings during exam week",
+    "How do I apply for a hostel room change?",
+    "fee structure for the second year computer engineering program",
+    "Who is the faculty coordinator of the placement cell?",
+    "Rules for re-evaluation of answer sheets",
+    "Is there a dress code on campus?",
+    "Steps to get a bonafide certificate from the administration office",
+    "What documents are required for admission under the management quota?",
+    "exam timetable",
+    "Can first year students take part in the inter-college sports fest and what is the registration deadline?",
+]
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB (Linux)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+class FullTextEncoder:
+    """Reference: the fp32 CLIPModel the "full" backend serves"""
+
+    def __init__(self, model_name: str):
+        from transformers import CLIPModel
+        self.model = CLIPModel.from_pretrained(model_name)
+        self.model.eval()
+
+    def encode(self, input_ids, attention_mask) -> np.ndarray:
+        import torch
+        with torch.no_grad():
+            features = self.model.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+        features = features.numpy()
+        return features / np.linalg.norm(features, axis=-1, keepdims=True)
+
+
+def load_backend(backend: str):
+    from transformers import CLIPProcessor
+    from config import Config
+    from services.clip_text_encoder import build_text_encoder
+
+    processor = CLIPProcessor.from_pretrained(Config.CLIP_MODEL_NAME)
+    if backend == "full":
+        return processor, FullTextEncoder(Config.CLIP_MODEL_NAME)
+    return processor, build_text_encoder(backend)
+
+
+def measure(backend: str, rounds: int) -> dict:
+    """Load one backend and report embeddings, latency and memory"""
+    baseline_rss = rss_mb()
+    processor, encoder = load_backend(backend)
+    loaded_rss = rss_mb()
+
+    def run(texts):
+        inputs = processor(text=texts, return_tensors="pt", padding=True,
+                           truncation=True, max_length=77)
+        return encoder.encode(inputs["input_ids"], inputs["attention_mask"])
+
+    embeddings = run(QUERIES)
+
+    single = []
+    for i in range(rounds):
+        start_time = time.perf_counter()
+        run([QUERIES[i % len(QUERIES)]])
+        single.append((time.perf_counter() - start_time) * 1000)
+
+    start_time = time.perf_counter()
+    for _ in range(rounds):
+        run(QUERIES)
+    batch_seconds = time.perf_counter() - start_time
+
+    return {
+        "embeddings": embeddings.tolist(),
+        "p50Ms": float(np.percentile(single, 50)),
+        "p99Ms": float(np.percentile(single, 99)),
+        "batchQps": rounds * len(QUERIES) / batch_seconds,
+        "modelMb": loaded_rss - baseline_rss,
+        "rssMb": rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=["torch", "torch-int8", "onnx", "onnx-int8"])
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.rounds)))
+        return
+
+    results = {}
+    for backend in ["full"] + [b for b in args.backends if b != "full"]:
+        print(f"⏱️ Measuring {backend}...")
+        output = subprocess.run(
+            [sys.executable, "-m", "tools.benchmark_clip_backends",
+             "--worker", backend, "--rounds", str(args.rounds)],
+            capture_output=True, text=True
+        )
+        if output.returncode != 0:
+            print(f"❌ {backend} failed:\n{output.stderr.strip()}")
+            results[backend] = None
+            continue
+        results[backend] = json.loads(output.stdout.strip().splitlines()[-1])
+
+    reference = np.asarray(results["full"]["embeddings"]) if results.get("full") else None
+    if reference is None:
+        raise SystemExit("❌ Reference CLIPModel failed to load")
+
+    print(f"\n{'backend':<12}{'min cos':>9}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'batch q/s':>11}{'model MB':>10}{'RSS MB':>9}")
+    failed = []
+    for backend, result in results.items():
+        if result is None:
+            failed.append(backend)
+            continue
+        min_cos = float(np.min(np.sum(reference * np.asarray(result["embeddings"]), axis=1)))
+        if min_cos < args.min_cosine:
+            failed.append(backend)
+        print(f"{backend:<12}{min_cos:>9.4f}{result['p50Ms']:>9.1f}{result['p99Ms']:>9.1f}"
+              f"{result['batchQps']:>11.0f}{result['modelMb']:>10.0f}{result['rssMb']:>9.0f}")
+
+    if failed:
+        raise SystemExit(f"\n❌ Failed or below cosine {args.min_cosine}: {', '.join(failed)}")
+    print(f"\n✅ All backends within cosine {args.min_cosine} of the fp32 model")
+
+
+if __name__ == "__main__":
+    main()
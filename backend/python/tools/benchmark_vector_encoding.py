@@ -0,0 +1,79 @@
+"""
+Compare stored size, decode time and accuracy of embedding encodings
+
+Usage (from backend/python):
+    python -m tools.benchmark_vector_encoding [--vectors 20000] [--dim 512]
+
+Uses synthetic unit vectors shaped like CLIP embeddings, so it needs no
+Firebase access. Sizes follow Firestore's storage rules: 8 bytes per
+number in an array, and the raw length of a bytes field.
+"""
+import argparse
+import time
+import numpy as np
+from utils.vector_codec import encode_embedding, decode_embedding
+
+
+def firestore_size(fields: dict) -> int:
+    """Storage size of the embedding fields of one document"""
+    size = 0
+    for name, value in fields.items():
+        size += len(name) + 1
+        if isinstance(value, list):
+            size += 8 * len(value)
+        elif isinstance(value, bytes):
+            size += len(value)
+        elif isinstance(value, str):
+            size += len(value) + 1
+        else:
+            size += 8
+    return size
+
+
+def recall_at_k(matrix: np.ndarray, decoded: np.ndarray, queries: np.ndarray, k: int) -> float:
+    """Share of the exact top-k neighbours still found using the decoded vectors"""
+    exact = np.argsort(-(queries @ matrix.T), axis=1)[:, :k]
+    approx = np.argsort(-(queries @ decoded.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(exact, approx)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((args.vectors, args.dim)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    queries = matrix[rng.choice(args.vectors, args.queries, replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"📊 {args.vectors} vectors x {args.dim} dims\n")
+    print(f"{'encoding':<10}{'bytes/vec':>11}{'total MB':>10}{'decode ms':>11}"
+          f"{'min cos':>10}{f'recall@{args.k}':>11}")
+
+    baseline_size = None
+    for encoding in ("json", "float16", "int8"):
+        documents = [encode_embedding(vector, encoding) for vector in matrix]
+        size = sum(firestore_size(fields) for fields in documents)
+        baseline_size = baseline_size or size
+
+        start_time = time.perf_counter()
+        decoded = np.vstack([decode_embedding(fields) for fields in documents])
+        decode_ms = (time.perf_counter() - start_time) * 1000
+
+        decoded_unit = decoded / np.linalg.norm(decoded, axis=1, keepdims=True)
+        min_cos = float(np.min(np.sum(matrix * decoded_unit, axis=1)))
+        recall = recall_at_k(matrix, decoded_unit, queries, args.k)
+
+        print(f"{encoding:<10}{size / args.vectors:>11.0f}{size / 1e6:>10.1f}{decode_ms:>11.1f}"
+              f"{min_cos:>10.5f}{recall:>11.3f}"
+              f"   ({baseline_size / size:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
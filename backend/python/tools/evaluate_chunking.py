@@ -0,0 +1,117 @@
+"""
+Compare chunking strategies on a fixed evaluation set
+
+Usage (from backend/python):
+    python -m tools.evaluate_chunking --pdfs handbook.pdf circular.pdf --eval eval.jsonl
+                                      [--configs chars:truncate tokens:mean chars:mean chars:separate]
+                                      [--k 5]
+
+The evaluation file has one JSON object per line:
+    {"question": "...", "file": "handbook.pdf", "page": 12}
+where page is 1-based. A question counts as recalled when a chunk from
+that file and page is among the top-k results.
+
+Each config is "<CHUNK_UNIT>:<CHUNK_MULTI_VECTOR>"; "chars:truncate" is the
+original 500-character splitter. Ingestion runs in-process (extraction and
+embedding, no Firestore writes) and each config gets its own in-memory
+vector index, searched the same way as in production.
+"""
+import argparse
+import json
+import os
+import time
+import numpy as np
+from config import Config
+from services.embedding_service import embedding_service
+from services.embedding_store import embedding_store
+from services.pdf_processor import PDFProcessor
+from services.text_chunking import clip_token_length
+from services.vector_index import VectorIndex
+from utils.vector_codec import encode_embedding
+
+
+def load_eval_set(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def truncated_share(docs) -> float:
+    """Share of text-chunk tokens beyond CLIP's window (dropped when truncating)"""
+    lengths = [clip_token_length(d.page_content) for d in docs if d.metadata.get("type") == "text"]
+    total = sum(lengths)
+    dropped = sum(max(0, n - Config.CLIP_TEXT_WINDOW) for n in lengths)
+    return dropped / total if total else 0.0
+
+
+def evaluate(config: str, pdfs: dict, questions: list, k: int) -> dict:
+    """Ingest every PDF with one chunking config and measure recall"""
+    Config.CHUNK_UNIT, Config.CHUNK_MULTI_VECTOR = config.split(":")
+    processor = PDFProcessor()
+    index = VectorIndex()
+    result = {"seconds": 0.0, "vectors": 0, "chunks": 0,
+              "embeddingBytes": 0, "contentBytes": 0, "truncated": 0.0}
+    truncated = []
+
+    for name, pdf_bytes in pdfs.items():
+        start_time = time.perf_counter()
+        docs, embeddings = processor.process_pdf(pdf_bytes, name)
+        result["seconds"] += time.perf_counter() - start_time
+
+        index.add_chunks([f"{name}_{i}" for i in range(len(docs))], name, docs, embeddings)
+        text_docs = [d for d in docs if d.metadata.get("type") == "text"]
+        unique_text = {(d.metadata.get("page"), d.page_content) for d in text_docs}
+        result["vectors"] += len(docs)
+        result["chunks"] += len(unique_text) + len(docs) - len(text_docs)
+        result["embeddingBytes"] += sum(len(encode_embedding(e, "float16")["embeddingBytes"]) for e in embeddings)
+        result["contentBytes"] += sum(len(d.page_content.encode()) for d in docs)
+        if Config.CHUNK_MULTI_VECTOR == "truncate":
+            truncated.append(truncated_share(docs))
+
+    result["truncated"] = float(np.mean(truncated)) if truncated else 0.0
+
+    hits_at_1 = hits_at_k = 0
+    for question in questions:
+        results = index.search(embedding_service.embed_text(question["question"]), k)
+        pages = [(doc.metadata["documentId"], doc.metadata["page"] + 1) for doc, _ in results]
+        target = (question["file"], question["page"])
+        hits_at_1 += bool(pages) and pages[0] == target
+        hits_at_k += target in pages
+    result["recallAt1"] = hits_at_1 / len(questions) if questions else 0.0
+    result["recallAtK"] = hits_at_k / len(questions) if questions else 0.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdfs", nargs="+", required=True)
+    parser.add_argument("--eval", required=True, help="JSONL of question/file/page")
+    parser.add_argument("--configs", nargs="+",
+                        default=["chars:truncate", "tokens:mean", "chars:mean", "chars:separate"])
+    parser.add_argument("--k", type=int, default=Config.TOP_K_RETRIEVAL)
+    args = parser.parse_args()
+
+    pdfs = {}
+    for path in args.pdfs:
+        with open(path, "rb") as f:
+            pdfs[os.path.basename(path)] = f.read()
+    questions = load_eval_set(args.eval)
+    embedding_service.load()
+    # Every config must pay its own embedding cost for the timings to compare
+    embedding_store.path = ""
+
+    results = {}
+    for config in args.configs:
+        print(f"⏱️ Evaluating {config}...")
+        results[config] = evaluate(config, pdfs, questions, args.k)
+
+    print(f"\n📊 {len(pdfs)} PDFs, {len(questions)} questions\n")
+    print(f"{'config':<16}{'ingest s':>9}{'chunks':>8}{'vectors':>9}{'index MB':>10}"
+          f"{'truncated':>11}{'R@1':>7}{f'R@{args.k}':>7}")
+    for config, r in results.items():
+        index_mb = (r["embeddingBytes"] + r["contentBytes"]) / 1e6
+        print(f"{config:<16}{r['seconds']:>9.1f}{r['chunks']:>8}{r['vectors']:>9}{index_mb:>10.2f}"
+              f"{r['truncated']:>11.1%}{r['recallAt1']:>7.2f}{r['recallAtK']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
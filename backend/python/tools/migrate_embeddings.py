@@ -0,0 +1,99 @@
+"""
+Re-encode stored embeddings from JSON arrays to compact binary vectors
+
+Usage (from backend/python):
+    python -m tools.migrate_embeddings [--encoding float16|int8] [--dry-run]
+                                       [--collections chunks questions]
+
+Documents that already have a binary embedding are skipped, so the
+migration can be interrupted and re-run. Readers accept both formats, so
+it is safe to run against a live deployment.
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from firebase_admin import firestore
+from database.firebase_client import firebase_client
+from database.bulk_writer import bulk_writer, estimate_size
+from utils.vector_codec import encode_embedding
+
+PAGE_SIZE = 500
+
+
+def _fetch_page(collection: str, after):
+    query = (firebase_client.db.collection(collection)
+             .order_by("__name__")
+             .limit(PAGE_SIZE))
+    if after is not None:
+        query = query.start_after(after)
+    return list(query.stream())
+
+
+async def migrate_collection(collection: str, encoding: str, dry_run: bool) -> dict:
+    """
+    Re-encode every legacy embedding in one collection
+
+    Returns:
+        dict: Documents scanned and migrated, and embedding bytes before/after
+    """
+    db = firebase_client.db
+    stats = {"scanned": 0, "migrated": 0, "bytesBefore": 0, "bytesAfter": 0}
+    after = None
+
+    while True:
+        page = await firebase_client.run(_fetch_page, collection, after)
+        if not page:
+            break
+        after = page[-1]
+
+        ops = []
+        for doc in page:
+            stats["scanned"] += 1
+            data = doc.to_dict()
+            if "embeddingBytes" in data or "embedding" not in data:
+                continue
+
+            fields = encode_embedding(np.asarray(data["embedding"], dtype=np.float32), encoding)
+            stats["bytesBefore"] += estimate_size(data["embedding"])
+            stats["bytesAfter"] += estimate_size(fields)
+            ops.append(("update", db.collection(collection).document(doc.id), {
+                **fields,
+                "embedding": firestore.DELETE_FIELD,
+            }))
+
+        if ops and not dry_run:
+            await bulk_writer.write(ops, label=f"{collection} embeddings")
+        stats["migrated"] += len(ops)
+        print(f"   {collection}: {stats['scanned']} scanned, {stats['migrated']} migrated")
+
+    return stats
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--encoding", choices=["float16", "int8"], default="float16")
+    parser.add_argument("--collections", nargs="+", default=["chunks", "questions"])
+    parser.add_argument("--dry-run", action="store_true", help="Report savings without writing")
+    args = parser.parse_args()
+
+    # is_connected never connects by itself
+    await firebase_client.run(firebase_client.connect)
+    if not firebase_client.is_connected:
+        raise SystemExit("Firebase not initialized - check the service account settings")
+
+    start_time = time.perf_counter()
+    for collection in args.collections:
+        print(f"🔄 Migrating {collection} to {args.encoding}{' (dry run)' if args.dry_run else ''}...")
+        stats = await migrate_collection(collection, args.encoding, args.dry_run)
+        saved = stats["bytesBefore"] - stats["bytesAfter"]
+        print(f"✅ {collection}: {stats['migrated']}/{stats['scanned']} documents re-encoded, "
+              f"{stats['bytesBefore'] / 1e6:.1f} MB -> {stats['bytesAfter'] / 1e6:.1f} MB "
+              f"({saved / 1e6:.1f} MB saved)")
+
+    firebase_client.shutdown()
+    print(f"⏱️ Done in {time.perf_counter() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
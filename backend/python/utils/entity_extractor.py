@@ -1,6 +1,7 @@
 """
 Entity extraction utilities for academic queries
 """
+import json
 
 def extract_entities(question: str) -> dict:
     """
@@ -55,4 +56,20 @@ def entities_match(a: dict, b: dict) -> bool:
     Returns:
         bool: True if entities match
     """
-    return a == b
\ No newline at end of file
+    return a == b
+
+
+def entity_key(entities: dict) -> str:
+    """
+    Canonical string form of an entity dict
+
+    Two questions satisfy entities_match exactly when their keys are equal,
+    which lets indexes group or filter questions by entities.
+
+    Args:
+        entities: dict - Entity dict from extract_entities
+        
+    Returns:
+        str: Stable key for the entities
+    """
+    return json.dumps(entities, sort_keys=True)
@@ -0,0 +1,98 @@
+"""
+Bounded in-process LRU cache with optional TTL
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Least-recently-used cache bounded by entry count (and optionally total
+    size), with per-entry expiry
+
+    Args:
+        maxsize: int - Maximum number of entries
+        ttl: float - Seconds an entry stays valid (None = never expires)
+        max_bytes: int - Maximum total size of values (None = unbounded);
+            a value larger than the whole budget is not cached
+        sizeof: callable(value) -> int - Size of a value (default: len)
+    """
+
+    def __init__(self, maxsize: int, ttl: float = None, max_bytes: int = None, sizeof=len):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Insert or refresh an entry, evicting the least recently used"""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        size = self._sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            self._drop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._data[key] = (value, expires_at)
+            self._bytes += size
+            while len(self._data) > self.maxsize or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._drop(next(iter(self._data)))
+
+    def _drop(self, key):
+        """Remove an entry if present (caller holds the lock)"""
+        entry = self._data.pop(key, None)
+        if entry is not None and self.max_bytes is not None:
+            self._bytes -= self._sizeof(entry[0])
+
+    def invalidate(self, key):
+        with self._lock:
+            self._drop(key)
+
+    def invalidate_where(self, predicate):
+        """Drop every entry whose key satisfies predicate"""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 3) if total else None,
+        }
+        if self.max_bytes is not None:
+            stats["bytes"] = self._bytes
+            stats["maxBytes"] = self.max_bytes
+        return stats
@@ -0,0 +1,70 @@
+"""
+Append-only NumPy buffer with doubling capacity
+"""
+import numpy as np
+
+
+class RowBuffer:
+    """
+    Preallocated array that grows by doubling and hands out views of its rows
+
+    Rows are only ever written past the current length, so a view returned
+    earlier keeps seeing exactly the rows it was created with while later
+    rows are appended. Appending is amortized O(rows appended) instead of
+    copying the whole array each time.
+
+    Args:
+        dtype: NumPy dtype of the elements
+        width: int - Columns per row (None = one-dimensional)
+    """
+
+    def __init__(self, dtype=np.float32, width: int = None):
+        self.dtype = dtype
+        self.width = width
+        self._data = np.empty(self._shape(0), dtype=dtype)
+        self._size = 0
+
+    @classmethod
+    def from_array(cls, array: np.ndarray):
+        """Buffer holding a copy of array's rows"""
+        array = np.asarray(array)
+        buffer = cls(array.dtype, array.shape[1] if array.ndim == 2 else None)
+        buffer.append(array)
+        return buffer
+
+    def _shape(self, rows: int):
+        return (rows,) if self.width is None else (rows, self.width)
+
+    def __len__(self):
+        return self._size
+
+    def view(self) -> np.ndarray:
+        """The rows appended so far (a view, not a copy)"""
+        return self._data[:self._size]
+
+    def append(self, rows) -> np.ndarray:
+        """
+        Append rows, reallocating at double the capacity when full
+
+        Args:
+            rows: array-like - Rows matching the buffer's width and dtype
+
+        Returns:
+            np.ndarray: View of every row, including the new ones
+        """
+        rows = np.asarray(rows, dtype=self.dtype).reshape(self._shape(-1))
+        end = self._size + len(rows)
+        if end > len(self._data):
+            grown = np.empty(self._shape(max(end, 2 * len(self._data), 16)), dtype=self.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = rows
+        self._size = end
+        return self.view()
+
+    def copy(self):
+        """Independent buffer with the same rows, for copy-on-write edits"""
+        buffer = RowBuffer(self.dtype, self.width)
+        buffer._data = self._data.copy()
+        buffer._size = self._size
+        return buffer
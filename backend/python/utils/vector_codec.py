@@ -0,0 +1,79 @@
+"""
+Compact binary encoding of embeddings stored in Firestore
+"""
+import numpy as np
+from config import Config
+
+# Firestore fields written by encode_embedding
+EMBEDDING_FIELDS = ("embedding", "embeddingBytes", "embeddingFormat", "embeddingScale")
+
+_DTYPES = {"float16": np.dtype("<f2"), "int8": np.dtype("i1")}
+
+
+def encode_embedding(embedding, encoding: str = None) -> dict:
+    """
+    Encode an embedding as Firestore fields
+
+    "float16" stores little-endian half floats; "int8" stores values
+    quantized symmetrically with one scale per vector. "json" keeps the
+    legacy array of doubles.
+
+    Args:
+        embedding: np.ndarray - 1-D embedding
+        encoding: str - "float16", "int8" or "json" (default Config.EMBEDDING_ENCODING)
+
+    Returns:
+        dict: Fields to merge into the document
+    """
+    encoding = encoding or Config.EMBEDDING_ENCODING
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+
+    if encoding == "json":
+        return {"embedding": vector.tolist()}
+    if encoding == "float16":
+        return {
+            "embeddingBytes": vector.astype(_DTYPES["float16"]).tobytes(),
+            "embeddingFormat": "float16",
+        }
+    if encoding == "int8":
+        peak = float(np.abs(vector).max()) if vector.size else 0.0
+        scale = peak / 127 if peak else 1.0
+        quantized = np.clip(np.rint(vector / scale), -127, 127).astype(_DTYPES["int8"])
+        return {
+            "embeddingBytes": quantized.tobytes(),
+            "embeddingFormat": "int8",
+            "embeddingScale": scale,
+        }
+    raise ValueError(f"Unknown embedding encoding: {encoding}")
+
+
+def decode_embedding(data: dict):
+    """
+    Read an embedding from a Firestore document in either format
+
+    Binary vectors are read with np.frombuffer, without per-element decoding.
+
+    Args:
+        data: dict - Document fields
+
+    Returns:
+        np.ndarray: float32 embedding, or None if the document has none
+    """
+    raw = data.get("embeddingBytes")
+    if raw is not None:
+        encoding = data.get("embeddingFormat", "float16")
+        vector = np.frombuffer(raw, dtype=_DTYPES[encoding]).astype(np.float32)
+        if encoding == "int8":
+            vector *= data.get("embeddingScale", 1.0)
+        return vector
+
+    if "embedding" in data:
+        return np.asarray(data["embedding"], dtype=np.float32)
+    return None
+
+
+def strip_embedding(data: dict) -> dict:
+    """Remove embedding fields from document data before returning it to clients"""
+    for field in EMBEDDING_FIELDS:
+        data.pop(field, None)
+    return data